@@ -0,0 +1,170 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Running many scenario config files on a bounded number of worker processes.
+
+This module only imports the standard library: the scenario module (and with it numpy and the solvers) is imported in
+the worker processes, once the number of threads of the numerical libraries is set.
+"""
+import glob
+import multiprocessing
+from multiprocessing import connection
+import os
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']
+
+
+@dataclass
+class ScenarioResult:
+    cfg_path: Path
+    status: str
+    """
+    'ok' or 'failed'
+    """
+    wall_time: float
+    """
+    seconds
+    """
+    peak_memory: Optional[float]
+    """
+    MB, maximum resident set size of the worker process and of the solver processes it started
+    """
+    error: Optional[str]
+
+
+def expand_config_args(config_args: List[str]) -> List[Path]:
+    """
+    Expand the glob patterns among the given config arguments (for shells that do not expand them), keeping the order
+    """
+    cfg_paths = []
+    for arg in config_args:
+        matches = sorted(glob.glob(arg, recursive=True)) if glob.has_magic(arg) else [arg]
+        cfg_paths.extend(Path(m).resolve() for m in matches)
+    return cfg_paths
+
+
+def run_batch(
+        cfg_paths: List[Path], max_workers: int, solver_threads: Optional[int], force: bool = False,
+        ) -> List[ScenarioResult]:
+    """
+    Run each scenario in its own worker process, at most `max_workers` at a time.
+
+    :param cfg_paths: Scenario config files
+    :param max_workers: Maximum number of scenarios running simultaneously
+    :param solver_threads: Number of solver threads per scenario (overrides solver_params.threads of every config).
+    Also caps the threads of the numerical libraries in the workers, so that the machine is not oversubscribed.
+    :param force: If True, run all the steps of every scenario, even those whose outputs are up to date
+
+    :return: One result per scenario, in the same order as `cfg_paths`
+    """
+    return _run_processes(cfg_paths, max_workers, solver_threads, force)
+
+
+def _run_processes(
+        cfg_paths: List[Path], max_workers: int, solver_threads: Optional[int], force: bool,
+        ) -> List[ScenarioResult]:
+    """
+    One process per scenario: peak memory is then measured per scenario, and memory is given back between scenarios.
+    These are plain (non-daemonic) processes, and not the workers of a Pool, so that the steps of a scenario can in
+    turn start their own worker processes (e.g. land_cover or plot_capacities_regions with `workers`).
+    """
+    ctx = multiprocessing.get_context('spawn')
+    pending = list(enumerate(cfg_paths))[::-1]
+    running = {}  # connection -> (index, process)
+    results = [None] * len(cfg_paths)
+
+    while pending or running:
+        while pending and len(running) < max_workers:
+            index, cfg_path = pending.pop()
+            receiver, sender = ctx.Pipe(duplex=False)
+            process = ctx.Process(target=_run_scenario_process, args=(sender, cfg_path, solver_threads, force))
+            process.start()
+            sender.close()
+            running[receiver] = (index, process)
+
+        for receiver in connection.wait(list(running)):
+            index, process = running.pop(receiver)
+            try:
+                result = receiver.recv()
+            except EOFError:  # the process died without sending its result
+                result = None
+            receiver.close()
+            process.join()
+            results[index] = result if result is not None else ScenarioResult(
+                cfg_path=cfg_paths[index], status='failed', wall_time=0.0, peak_memory=None,
+                error=f'worker process exited with code {process.exitcode}',
+            )
+
+    return results
+
+
+def _run_scenario_process(sender: connection.Connection, cfg_path: Path, solver_threads: Optional[int], force: bool):
+    # Set (overriding any value inherited from the shell) before numpy and the solvers are imported in this process,
+    # i.e. before the scenario module is. The worker processes of the steps inherit them.
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(solver_threads or 1)
+
+    sender.send(_run_scenario_task((cfg_path, solver_threads, force)))
+    sender.close()
+
+
+def _run_scenario_task(task: Tuple[Path, Optional[int], bool]) -> ScenarioResult:
+    cfg_path, solver_threads, force = task
+
+    start = time.perf_counter()
+    status, error = 'ok', None
+    try:
+        from grim_opt.scenario import run_scenario
+        run_scenario(cfg_path, solver_threads=solver_threads, force=force)
+    except Exception as e:
+        traceback.print_exc()
+        status, error = 'failed', f'{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ""}'
+    wall_time = time.perf_counter() - start
+
+    return ScenarioResult(cfg_path=cfg_path, status=status, wall_time=wall_time, peak_memory=_peak_memory(), error=error)
+
+
+def _peak_memory() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+
+    # ru_maxrss is in kilobytes on Linux, and in bytes on macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return peak * unit / 2 ** 20
+
+
+def format_summary(results: List[ScenarioResult]) -> str:
+    header = ('Scenario', 'Status', 'Wall time (s)', 'Peak memory (MB)')
+    rows = [
+        (
+            str(res.cfg_path),
+            res.status if res.error is None else f'{res.status} ({res.error})',
+            f'{res.wall_time:.1f}',
+            f'{res.peak_memory:.0f}' if res.peak_memory is not None else '-',
+        )
+        for res in results
+    ]
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+
+    lines = ['  '.join(cell.ljust(w) for cell, w in zip(header, widths))]
+    lines.append('  '.join('-' * w for w in widths))
+    lines.extend('  '.join(cell.ljust(w) for cell, w in zip(row, widths)) for row in rows)
+    return '\n'.join(lines)
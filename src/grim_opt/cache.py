@@ -0,0 +1,68 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+On-disk cache for intermediate results that are expensive to compute but depend only on a few inputs.
+
+The cache lives in `$GRIM_OPT_CACHE_DIR` (default: `~/.cache/grim_opt`); entries are keyed by hashes of their inputs,
+so it is always safe to delete it.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def cache_dir(*subdirs: str) -> Path:
+    base = Path(os.environ.get('GRIM_OPT_CACHE_DIR', Path.home() / '.cache' / 'grim_opt'))
+    path = base.joinpath(*subdirs)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def hash_arrays(*arrays) -> str:
+    """
+    Hash of the contents (values, dtypes and shapes) of the given arrays, or of anything convertible to an array
+    """
+    h = hashlib.sha256()
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        h.update(f'{arr.dtype.str}{arr.shape}'.encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def save_npy_atomic(path: Path, arr: np.ndarray):
+    """
+    Write an array so that concurrent readers (e.g. parallel scenarios) never see a partially written file
+    """
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp, 'wb') as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def save_pickle_atomic(path: Path, df: pd.DataFrame):
+    """
+    Same as `save_npy_atomic`, for a DataFrame
+    """
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    df.to_pickle(tmp)
+    os.replace(tmp, path)
+
+
+def save_json_atomic(path: Path, obj):
+    """
+    Same as `save_npy_atomic`, for a JSON-serializable object
+    """
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
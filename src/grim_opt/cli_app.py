@@ -6,16 +6,18 @@
 #
 #  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import argparse
+import os
+import sys
 from pathlib import Path
 
-from grim_opt.config_parse import read_from_yaml
-from grim_opt.land_cover import perform_land_cover
-from grim_opt.optimization import perform_optimization
+# the processing steps (and their dependencies) are imported only once the arguments are parsed, and only the steps
+# that run: printing the help or running a single step does not pay for importing all of them
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', help='Path to scenario config file (default: \'./config.yaml\')')
+    parser.add_argument('--force', action='store_true', help='Run all the steps, even those whose outputs are up to date')
 
     args = parser.parse_args()
 
@@ -28,23 +30,33 @@ def main():
 
     print(f"Scenario config file used = \"{cfg_path}\"")
 
-    cfg_landcover, cfg_opt = read_from_yaml(cfg_path)
-
-    # Perform this step only of the 'land_cover' section is present in the YAML
-    if cfg_landcover is not None:
-        perform_land_cover(
-            paths=cfg_landcover.paths,
-            out_shp=cfg_landcover.out_shp,
-            r=cfg_landcover.r,
-            class_artificial_indices=cfg_landcover.class_artificial_indices,
-        )
-
-    # Perform this step only of the 'optimization' section is present in the YAML
-    if cfg_opt is not None:
-        perform_optimization(
-            paths=cfg_opt.paths,
-            et_params=cfg_opt.et_params,
-            solver_params=cfg_opt.solver_params,
-            num_rows_cost_params=cfg_opt.num_rows_cost_params,
-            other_params=cfg_opt.other_params,
-        )
+    from grim_opt.scenario import run_scenario
+    run_scenario(cfg_path, force=args.force)
+
+
+def main_batch():
+    parser = argparse.ArgumentParser(description='Run many scenario config files on a bounded pool of processes')
+    parser.add_argument('configs', nargs='+', help='Paths to scenario config files, or glob patterns (e.g. \'experiments/*/config.yaml\')')
+    parser.add_argument('--workers', type=int, default=None, help='Maximum number of scenarios running simultaneously (default: number of CPUs / solver threads)')
+    parser.add_argument('--solver-threads', type=int, default=None, help='Number of solver threads per scenario, overriding solver_params.threads (default: as in each config)')
+    parser.add_argument('--force', action='store_true', help='Run all the steps of every scenario, even those whose outputs are up to date')
+
+    args = parser.parse_args()
+
+    from grim_opt.batch import expand_config_args, run_batch, format_summary
+    cfg_paths = expand_config_args(args.configs)
+    if not cfg_paths:
+        parser.error('no scenario config files found')
+
+    workers = args.workers
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // (args.solver_threads or 1))
+
+    print(f"Running {len(cfg_paths)} scenarios on {workers} worker processes")
+
+    results = run_batch(cfg_paths, max_workers=workers, solver_threads=args.solver_threads, force=args.force)
+
+    print(format_summary(results))
+
+    if any(res.status != 'ok' for res in results):
+        sys.exit(1)
@@ -8,9 +8,9 @@
 """
 Definitions (classes) for all configuration arguments used in the different processing steps of GRIM.
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
@@ -36,6 +36,21 @@ class LandCoverPaths:
         )
 
 
+@dataclass
+class GenerationAreaPaths:
+    region_area_land_cover: Path
+    region_names: Path
+    region_area_generation: Path  # output
+
+    @staticmethod
+    def convention_paths_experiment_root(experiment: Path):
+        return GenerationAreaPaths(
+            region_area_land_cover=mkdefaultpath(experiment, FileID.REGION_AREA_LAND_COVER_CLASSES),
+            region_names=mkdefaultpath(experiment, FileID.REGION_NAMES),
+            region_area_generation=mkdefaultpath(experiment, FileID.REGION_AREA_GENERATION),
+        )
+
+
 @dataclass
 class OptimizationPaths:
     region_area_generation: Path
@@ -63,6 +78,45 @@ class OptimizationPaths:
             optimized_transcap_renew=mkdefaultpath_arg(experiment, FileID.OPTIMIZED_TRANSCAP_RENEW, f'{int(omega * 100)}'),
         )
 
+    def for_omega(self, omega: float):
+        """
+        Same paths, but with the outputs renamed (in their same folders) after the given renewable energy target
+        """
+        pct = f'{int(omega * 100)}'
+        return replace(
+            self,
+            optimized_gencap_renew=self.optimized_gencap_renew.parent / FileID.OPTIMIZED_GENCAP_RENEW.defaultfilename()(pct),
+            optimized_transcap_renew=self.optimized_transcap_renew.parent / FileID.OPTIMIZED_TRANSCAP_RENEW.defaultfilename()(pct),
+        )
+
+
+@dataclass
+class PlotRegionsPaths:
+    region_names: Path
+    gis_nlregions: Path
+    region_area_generation: Path
+    plot_capacities_regions: Path  # output
+
+    @staticmethod
+    def convention_paths_experiment_root(experiment: Path):
+        return PlotRegionsPaths(
+            region_names=mkdefaultpath(experiment, FileID.REGION_NAMES),
+            gis_nlregions=mkdefaultpath(experiment, FileID.POLYGONS_BASE),
+            region_area_generation=mkdefaultpath(experiment, FileID.REGION_AREA_GENERATION),
+            plot_capacities_regions=mkdefaultpath(experiment, FileID.PLOT_CAPACITIES_REGIONS),
+        )
+
+
+@dataclass
+class PlotTotalsPaths:
+    plot_capacities_totals: Path  # output
+
+    @staticmethod
+    def convention_paths_experiment_root(experiment: Path):
+        return PlotTotalsPaths(
+            plot_capacities_totals=mkdefaultpath(experiment, FileID.PLOT_CAPACITIES_TOTALS),
+        )
+
 
 @dataclass
 class SolverParams:
@@ -70,6 +124,54 @@ class SolverParams:
     crossover: Optional[int]
     method: Optional[int]
     threads: Optional[int]
+    warm_start: bool
+    """
+    Start each solve of an omega sweep from the basis of the previous one (only the in-process HiGHS solver)
+    """
+
+
+@dataclass
+class OptFormulationParams:
+    model_builder: str
+    """
+    'pyomo' (one Python rule callback per constraint, solved through SolverFactory) or
+    'matrix' (constraints assembled as sparse coefficient blocks from NumPy arrays, handed to HiGHS directly)
+    """
+    flow_formulation: str
+    """
+    'ptdf' (line flows as PTDF-weighted sums of the net injections of all nodes),
+    'angle' (voltage angle variables, one sparse equation per line, using the reactance x of the line), or
+    'auto' (whichever of the two gives the fewest nonzeros for the network at hand)
+    """
+    ptdf_threshold: float
+    """
+    PTDF entries with a smaller magnitude are dropped (only for the 'ptdf' flow formulation). 0 keeps them all.
+    """
+    eliminate_auxiliary: bool
+    """
+    Substitute the line flows F by their defining expression in the constraints using them, instead of declaring them
+    as variables with equality constraints. With the 'angle' flow formulation, the same is done for Z_net.
+    """
+
+
+@dataclass
+class OptAggregationParams:
+    num_periods: int
+    """
+    Number of representative periods
+    """
+    period_length: int
+    """
+    Number of time steps per period, e.g. 24 (days) or 168 (weeks)
+    """
+    method: str
+    """
+    'kmeans' (representative periods are cluster centroids) or 'kmedoids' (representative periods are actual periods)
+    """
+    seed: int
+    """
+    Seed of the clustering initialization, for reproducible results
+    """
 
 
 @dataclass
@@ -140,6 +242,20 @@ class OptOtherParams:
     """
     0<= float <=1
     """
+    start_hour: int
+    """
+    0 <= int, first time step of the time series files that is modelled: time step t of the model is start_hour + t
+    """
+
+@dataclass
+class LandCoverVariant:
+    name: str
+    """
+    Suffix of the file name of the table of this variant
+    """
+    r: int
+    class_artificial_indices: List[int]
+
 
 @dataclass
 class ConfigLandCover:
@@ -147,6 +263,37 @@ class ConfigLandCover:
     out_shp: Tuple[int, int]
     r: int
     class_artificial_indices: List[int]
+    tile_size: Optional[int]
+    """
+    None: the whole raster is processed at once. Otherwise, it is processed in square tiles of this many cells per side.
+    """
+    workers: Optional[int]
+    """
+    None or 1: the tiles are processed one after the other. Otherwise, they are processed by this many worker processes.
+    """
+    exclusion_method: str
+    """
+    'edt' (distance transform), 'fft' (FFT convolution) or 'dilation' (binary dilation): how the cells within r of the
+    artificial surfaces are found. Same result, the cost of 'dilation' grows with r².
+    """
+    variants: List[LandCoverVariant]
+    """
+    Other (r, class_artificial_indices) combinations, each producing its own table, in the same pass over the raster
+    """
+
+
+@dataclass
+class ConfigGenerationArea:
+    paths: GenerationAreaPaths
+    suitability: Dict[str, Dict[int, float]]
+    """
+    Per technology (column of region_area_generation), the fraction of the area of each land cover class (grid code)
+    that is suitable for it. Classes not listed are not suitable.
+    """
+    cell_area: float
+    """
+    Area of one cell of the land cover raster (km2)
+    """
 
 
 @dataclass
@@ -156,3 +303,53 @@ class ConfigOptimization:
     solver_params: SolverParams
     num_rows_cost_params: int
     other_params: OptOtherParams
+    formulation_params: OptFormulationParams
+    omega_sweep: Optional[List[float]]
+    """
+    If present, the model is built once and solved for each of these values of omega (other_params.omega is ignored)
+    """
+    aggregation_params: Optional[OptAggregationParams]
+    """
+    If present, the time series are aggregated into representative periods before building the model
+    """
+
+
+@dataclass
+class RegionMapColumn:
+    technology: str
+    """
+    Row of the optimized_gencap files
+    """
+    title: str
+    cmap: str
+    """
+    Name of a matplotlib colormap
+    """
+    relative_to: Optional[str] = None
+    """
+    None: the capacities are shown (MW). Otherwise, the column of region_area_generation they are divided by (e.g. the
+    maximum capacity of the technology in every region), shown as a fraction between 0 and 1.
+    """
+
+
+@dataclass
+class ConfigPlotRegions:
+    paths: PlotRegionsPaths
+    scenarios: List[Tuple[str, Path]]
+    """
+    (label, optimized_gencap file) of every row of maps
+    """
+    columns: List[RegionMapColumn]
+    workers: Optional[int]
+    """
+    None or 1: the maps are rendered one after the other. Otherwise, they are rendered by this many worker processes.
+    """
+
+
+@dataclass
+class ConfigPlotTotals:
+    paths: PlotTotalsPaths
+    scenarios: List[Tuple[str, Path, Path]]
+    """
+    (label, optimized_gencap file, optimized_transcap file) of every bar
+    """
@@ -10,9 +10,10 @@ Default values for all configuration arguments used in the different processing
 """
 import numpy as np
 
-from grim_opt.path_helpers import DEFAULT_EXP_ROOT
+from grim_opt.path_helpers import DEFAULT_EXP_ROOT, FileID, mkdefaultpath_arg
 from grim_opt.config import SolverParams, EnergyTechParams, LandCoverPaths, OptimizationPaths, OptOtherParams, ConfigLandCover, \
-    ConfigOptimization
+    ConfigOptimization, OptFormulationParams, OptAggregationParams, ConfigGenerationArea, GenerationAreaPaths, \
+    ConfigPlotRegions, PlotRegionsPaths, RegionMapColumn, ConfigPlotTotals, PlotTotalsPaths
 
 
 config_land_cover_default = ConfigLandCover(
@@ -20,6 +21,20 @@ config_land_cover_default = ConfigLandCover(
     out_shp=(4721, 4412),
     r=0,
     class_artificial_indices=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+    tile_size=None,
+    workers=None,
+    exclusion_method='edt',
+    variants=[],
+)
+
+
+# agricultural land: non-irrigated arable land, pastures, complex cultivation patterns, agriculture with natural vegetation
+suitable_classes_default = {12: 1.0, 18: 1.0, 20: 1.0, 21: 1.0}
+
+config_generation_area_default = ConfigGenerationArea(
+    paths=GenerationAreaPaths.convention_paths_experiment_root(DEFAULT_EXP_ROOT),
+    suitability={'wind': suitable_classes_default, 'solar': suitable_classes_default},
+    cell_area=0.01,  # 100 m x 100 m
 )
 
 
@@ -41,6 +56,7 @@ solver_params_default = SolverParams(
     crossover=None,
     method=None,
     threads=None,  # other possibility: 8
+    warm_start=True,
 )
 
 opt_R_default = 1
@@ -56,6 +72,21 @@ opt_otherparams_default = OptOtherParams(
     reserve_margin=0.5,
     omega=1.0,
     e_l=0.25,
+    start_hour=0,
+)
+
+formulation_params_default = OptFormulationParams(
+    model_builder='pyomo',
+    flow_formulation='ptdf',
+    ptdf_threshold=0.0,
+    eliminate_auxiliary=False,
+)
+
+aggregation_params_default = OptAggregationParams(
+    num_periods=12,
+    period_length=24,
+    method='kmedoids',
+    seed=0,
 )
 
 
@@ -65,4 +96,44 @@ config_optimization_default = ConfigOptimization(
     solver_params=solver_params_default,
     num_rows_cost_params=1000,
     other_params=opt_otherparams_default,
+    formulation_params=formulation_params_default,
+    omega_sweep=None,
+    aggregation_params=None,
+)
+
+
+# (label, {pct} of the optimized_gencap file) of every scenario
+plot_regions_scenarios_default = [
+    ('0% RES', 'no'), ('20% RES', '20'), ('50% RES', '50'), ('80% RES', '80'), ('100% RES', '100'),
+]
+
+config_plot_regions_default = ConfigPlotRegions(
+    paths=PlotRegionsPaths.convention_paths_experiment_root(DEFAULT_EXP_ROOT),
+    scenarios=[
+        (label, mkdefaultpath_arg(DEFAULT_EXP_ROOT, FileID.OPTIMIZED_GENCAP_RENEW, pct))
+        for label, pct in plot_regions_scenarios_default
+    ],
+    columns=[
+        RegionMapColumn(technology='wind', title='Onshore Wind(MW)', cmap='Blues'),
+        RegionMapColumn(technology='wind', title='Onshore Wind fraction', cmap='Blues', relative_to='Max_wind'),
+        RegionMapColumn(technology='solar', title='Solar PV(MW)', cmap='Reds'),
+        RegionMapColumn(technology='solar', title='Solar PV fraction', cmap='Reds', relative_to='Max_solar'),
+        RegionMapColumn(technology='biomass', title='Biomass(MW)', cmap='Greens'),
+        RegionMapColumn(technology='coal', title='Coal(MW)', cmap='Purples'),
+        RegionMapColumn(technology='CCGT', title='CCGT(MW)', cmap='Greys'),
+    ],
+    workers=None,
+)
+
+# (label, {pct} of the optimized_gencap and optimized_transcap files) of every scenario
+plot_totals_scenarios_default = [('0%', 'no'), ('20%', '20'), ('50%', '50'), ('80%', '80'), ('100%', '100')]
+
+config_plot_totals_default = ConfigPlotTotals(
+    paths=PlotTotalsPaths.convention_paths_experiment_root(DEFAULT_EXP_ROOT),
+    scenarios=[
+        (label,
+         mkdefaultpath_arg(DEFAULT_EXP_ROOT, FileID.OPTIMIZED_GENCAP_RENEW, pct),
+         mkdefaultpath_arg(DEFAULT_EXP_ROOT, FileID.OPTIMIZED_TRANSCAP_RENEW, pct))
+        for label, pct in plot_totals_scenarios_default
+    ],
 )
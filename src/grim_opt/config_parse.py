@@ -13,11 +13,15 @@ import yaml
 
 from grim_opt.path_helpers import mkdefaultrelpath, FileID
 from grim_opt.config import ConfigLandCover, ConfigOptimization, LandCoverPaths, SolverParams, EnergyTechParams, \
-    OptOtherParams, OptimizationPaths
+    OptOtherParams, OptimizationPaths, OptFormulationParams, \
+    OptAggregationParams, LandCoverVariant, ConfigGenerationArea, GenerationAreaPaths, ConfigPlotRegions, \
+    PlotRegionsPaths, RegionMapColumn, ConfigPlotTotals, PlotTotalsPaths
 import grim_opt.config_defaults as defs
 
 
-def read_from_yaml(cfg_path: Path) -> Tuple[Optional[ConfigLandCover], Optional[ConfigOptimization]]:
+def read_from_yaml(cfg_path: Path) -> Tuple[
+        Optional[ConfigLandCover], Optional[ConfigGenerationArea], Optional[ConfigOptimization],
+        Optional[ConfigPlotRegions], Optional[ConfigPlotTotals]]:
     cfg_file = cfg_path.resolve()
     cfg_file_dir = cfg_file.parent
 
@@ -28,11 +32,23 @@ def read_from_yaml(cfg_path: Path) -> Tuple[Optional[ConfigLandCover], Optional[
     if 'land_cover' in cfg_dict:
         cfg_land_cover = __parse_cfg_land_cover(cfg_dict['land_cover'], cfg_file_dir)
 
+    cfg_generation_area: Optional[ConfigGenerationArea] = None
+    if 'generation_area' in cfg_dict:
+        cfg_generation_area = __parse_cfg_generation_area(cfg_dict['generation_area'], cfg_file_dir)
+
     cfg_optimization: Optional[ConfigOptimization] = None
     if 'optimization' in cfg_dict:
         cfg_optimization = __parse_cfg_optimization(cfg_dict['optimization'], cfg_file_dir)
 
-    return cfg_land_cover, cfg_optimization
+    cfg_plot_regions: Optional[ConfigPlotRegions] = None
+    if 'plot_capacities_regions' in cfg_dict:
+        cfg_plot_regions = __parse_cfg_plot_regions(cfg_dict['plot_capacities_regions'], cfg_file_dir)
+
+    cfg_plot_totals: Optional[ConfigPlotTotals] = None
+    if 'plot_capacities_totals' in cfg_dict:
+        cfg_plot_totals = __parse_cfg_plot_totals(cfg_dict['plot_capacities_totals'], cfg_file_dir)
+
+    return cfg_land_cover, cfg_generation_area, cfg_optimization, cfg_plot_regions, cfg_plot_totals
 
 
 def __parse_cfg_land_cover(dict_land_cover: dict, exp_root: Path) -> ConfigLandCover:
@@ -59,7 +75,44 @@ def __parse_cfg_land_cover(dict_land_cover: dict, exp_root: Path) -> ConfigLandC
 
     class_artificial_indices = dict_land_cover.get('class_artificial_indices', defs.config_land_cover_default.class_artificial_indices)
 
-    return ConfigLandCover(paths=paths, out_shp=out_shp, r=r, class_artificial_indices=class_artificial_indices)
+    tile_size = dict_land_cover.get('tile_size', defs.config_land_cover_default.tile_size)
+    workers = dict_land_cover.get('workers', defs.config_land_cover_default.workers)
+    exclusion_method = dict_land_cover.get('exclusion_method', defs.config_land_cover_default.exclusion_method)
+
+    # each variant defaults to the classes of the section, and is named after its radius
+    variants = [
+        LandCoverVariant(
+            name=str(dict_variant.get('name', f'r{dict_variant["r"]}')),
+            r=dict_variant['r'],
+            class_artificial_indices=dict_variant.get('class_artificial_indices', class_artificial_indices),
+        )
+        for dict_variant in dict_land_cover.get('variants', defs.config_land_cover_default.variants)
+    ]
+
+    return ConfigLandCover(
+        paths=paths, out_shp=out_shp, r=r, class_artificial_indices=class_artificial_indices, tile_size=tile_size,
+        workers=workers, exclusion_method=exclusion_method, variants=variants,
+    )
+
+
+def __parse_cfg_generation_area(dict_generation_area: dict, exp_root: Path) -> ConfigGenerationArea:
+    # The absence of a 'paths' key means we wish FULLY DEFAULT paths
+    paths = GenerationAreaPaths.convention_paths_experiment_root(exp_root)
+    if 'paths' in dict_generation_area:
+        paths_dict = dict_generation_area['paths']
+        # Otherwise, the elements of the 'paths' section should be relative to the folder where this config file sits
+        paths = GenerationAreaPaths(
+            region_area_land_cover=exp_root / paths_dict.get('region_area_land_cover',
+                                                             mkdefaultrelpath(FileID.REGION_AREA_LAND_COVER_CLASSES)),
+            region_names=exp_root / paths_dict.get('region_names', mkdefaultrelpath(FileID.REGION_NAMES)),
+            region_area_generation=exp_root / paths_dict.get('region_area_generation',
+                                                             mkdefaultrelpath(FileID.REGION_AREA_GENERATION)),
+        )
+
+    suitability = dict_generation_area.get('suitability', defs.config_generation_area_default.suitability)
+    cell_area = dict_generation_area.get('cell_area', defs.config_generation_area_default.cell_area)
+
+    return ConfigGenerationArea(paths=paths, suitability=suitability, cell_area=cell_area)
 
 
 def __parse_cfg_optimization(dict_opt: dict, exp_root: Path) -> ConfigOptimization:
@@ -74,6 +127,7 @@ def __parse_cfg_optimization(dict_opt: dict, exp_root: Path) -> ConfigOptimizati
             crossover=dict_solver.get('crossover', defs_solver.crossover),
             method=dict_solver.get('method', defs_solver.method),
             threads=dict_solver.get('threads', defs_solver.threads),
+            warm_start=dict_solver.get('warm_start', defs_solver.warm_start),
         )
 
     defs_et = defs.config_optimization_default.et_params
@@ -106,6 +160,32 @@ def __parse_cfg_optimization(dict_opt: dict, exp_root: Path) -> ConfigOptimizati
             reserve_margin=dict_other.get('reserve_margin', defs_other.reserve_margin),
             omega=dict_other.get('omega', defs_other.omega),
             e_l=dict_other.get('e_l', defs_other.e_l),
+            start_hour=dict_other.get('start_hour', defs_other.start_hour),
+        )
+
+    defs_formulation = defs.config_optimization_default.formulation_params
+    formulation_params = defs_formulation
+    if 'formulation' in dict_opt:
+        dict_formulation = dict_opt['formulation']
+        formulation_params = OptFormulationParams(
+            model_builder=dict_formulation.get('model_builder', defs_formulation.model_builder),
+            flow_formulation=dict_formulation.get('flow_formulation', defs_formulation.flow_formulation),
+            ptdf_threshold=dict_formulation.get('ptdf_threshold', defs_formulation.ptdf_threshold),
+            eliminate_auxiliary=dict_formulation.get('eliminate_auxiliary', defs_formulation.eliminate_auxiliary),
+        )
+
+    omega_sweep = dict_opt.get('omega_sweep', defs.config_optimization_default.omega_sweep)
+
+    # The absence of an 'aggregation' key means the full chronological time series are used
+    aggregation_params = defs.config_optimization_default.aggregation_params
+    if 'aggregation' in dict_opt:
+        dict_aggregation = dict_opt['aggregation']
+        defs_aggregation = defs.aggregation_params_default
+        aggregation_params = OptAggregationParams(
+            num_periods=dict_aggregation.get('num_periods', defs_aggregation.num_periods),
+            period_length=dict_aggregation.get('period_length', defs_aggregation.period_length),
+            method=dict_aggregation.get('method', defs_aggregation.method),
+            seed=dict_aggregation.get('seed', defs_aggregation.seed),
         )
 
     # The absence of a 'paths' key means we wish FULLY DEFAULT paths
@@ -128,4 +208,75 @@ def __parse_cfg_optimization(dict_opt: dict, exp_root: Path) -> ConfigOptimizati
     return ConfigOptimization(
         paths=paths, et_params=et_params, solver_params=solver_params,
         num_rows_cost_params=num_rows_cost_params, other_params=other_params,
+        formulation_params=formulation_params, omega_sweep=omega_sweep, aggregation_params=aggregation_params,
     )
+
+
+def __parse_cfg_plot_regions(dict_plot: dict, exp_root: Path) -> ConfigPlotRegions:
+    # The absence of a 'paths' key means we wish FULLY DEFAULT paths
+    paths = PlotRegionsPaths.convention_paths_experiment_root(exp_root)
+    if 'paths' in dict_plot:
+        paths_dict = dict_plot['paths']
+        # Otherwise, the elements of the 'paths' section should be relative to the folder where this config file sits
+        paths = PlotRegionsPaths(
+            region_names=exp_root / paths_dict.get('region_names', mkdefaultrelpath(FileID.REGION_NAMES)),
+            gis_nlregions=exp_root / paths_dict.get('gis_nlregions', mkdefaultrelpath(FileID.POLYGONS_BASE)),
+            region_area_generation=exp_root / paths_dict.get('region_area_generation',
+                                                             mkdefaultrelpath(FileID.REGION_AREA_GENERATION)),
+            plot_capacities_regions=exp_root / paths_dict.get('plot_capacities_regions',
+                                                              mkdefaultrelpath(FileID.PLOT_CAPACITIES_REGIONS)),
+        )
+
+    # each scenario is either {'omega': ...} (the optimized_gencap file of that omega) or {'label': ..., 'path': ...};
+    # by default, the same scenarios as in the default experiment, but in this one
+    scenarios = [
+        (label, exp_root / mkdefaultrelpath(FileID.OPTIMIZED_GENCAP_RENEW, pct))
+        for label, pct in defs.plot_regions_scenarios_default
+    ]
+    if 'scenarios' in dict_plot:
+        scenarios = [
+            (f'{int(d["omega"] * 100)}% RES',
+             exp_root / mkdefaultrelpath(FileID.OPTIMIZED_GENCAP_RENEW, f'{int(d["omega"] * 100)}'))
+            if 'omega' in d else (d['label'], exp_root / d['path'])
+            for d in dict_plot['scenarios']
+        ]
+
+    columns = defs.config_plot_regions_default.columns
+    if 'columns' in dict_plot:
+        columns = [RegionMapColumn(**d) for d in dict_plot['columns']]
+
+    workers = dict_plot.get('workers', defs.config_plot_regions_default.workers)
+
+    return ConfigPlotRegions(paths=paths, scenarios=scenarios, columns=columns, workers=workers)
+
+
+def __parse_cfg_plot_totals(dict_plot: dict, exp_root: Path) -> ConfigPlotTotals:
+    # The absence of a 'paths' key means we wish FULLY DEFAULT paths
+    paths = PlotTotalsPaths.convention_paths_experiment_root(exp_root)
+    if 'paths' in dict_plot:
+        paths_dict = dict_plot['paths']
+        # Otherwise, the elements of the 'paths' section should be relative to the folder where this config file sits
+        paths = PlotTotalsPaths(
+            plot_capacities_totals=exp_root / paths_dict.get('plot_capacities_totals',
+                                                             mkdefaultrelpath(FileID.PLOT_CAPACITIES_TOTALS)),
+        )
+
+    # each scenario is either {'omega': ...} (the optimized files of that omega) or
+    # {'label': ..., 'gencap_path': ..., 'transcap_path': ...}; by default, the same scenarios as in the default
+    # experiment, but in this one
+    scenarios = [
+        (label,
+         exp_root / mkdefaultrelpath(FileID.OPTIMIZED_GENCAP_RENEW, pct),
+         exp_root / mkdefaultrelpath(FileID.OPTIMIZED_TRANSCAP_RENEW, pct))
+        for label, pct in defs.plot_totals_scenarios_default
+    ]
+    if 'scenarios' in dict_plot:
+        scenarios = [
+            (f'{int(d["omega"] * 100)}%',
+             exp_root / mkdefaultrelpath(FileID.OPTIMIZED_GENCAP_RENEW, f'{int(d["omega"] * 100)}'),
+             exp_root / mkdefaultrelpath(FileID.OPTIMIZED_TRANSCAP_RENEW, f'{int(d["omega"] * 100)}'))
+            if 'omega' in d else (d['label'], exp_root / d['gencap_path'], exp_root / d['transcap_path'])
+            for d in dict_plot['scenarios']
+        ]
+
+    return ConfigPlotTotals(paths=paths, scenarios=scenarios)
@@ -0,0 +1,83 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Exclusion buffers around land cover classes: the cells within a radius r (in cells, measured between cell centers) of
+any cell of the given classes, i.e. the binary dilation of these cells by a disk of radius r.
+"""
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+import numpy as np
+from scipy import ndimage, signal
+
+EXCLUSION_METHODS = ('edt', 'fft', 'dilation')
+
+
+def disk_kernel(r: int) -> np.ndarray:
+    """
+    :return: The cells (dx, dy) with dx² + dy² <= r², shape = (2r + 1, 2r + 1)
+    """
+    X, Y = [np.arange(-r, r+1)]*2
+    return X[:, None]**2 + Y**2 <= r*r
+
+
+def exclusion_masks(
+        land_cover: np.ndarray, buffers: Sequence[Tuple[int, Sequence[int]]], method: str = 'edt',
+        ) -> List[np.ndarray]:
+    """
+    Compute the exclusion masks of several buffers at once. The work depending only on the excluded classes (e.g. the
+    distance transform) is done once for all the buffers that share the same classes.
+
+    The methods give the same masks, at different costs:
+
+    * 'edt': threshold the exact Euclidean distance transform to the excluded cells. The cost does not depend on r,
+      and every extra radius only costs a comparison.
+    * 'fft': convolve the excluded cells with the disk kernel by FFT, cost O(n log n) per radius.
+    * 'dilation': `ndimage.binary_dilation` with the disk kernel, cost O(n r²) per radius (reference implementation).
+
+    :param land_cover: Land cover classes of the raster cells
+    :param buffers: (radius, excluded classes) pairs
+    :param method: One of EXCLUSION_METHODS
+
+    :return: For every buffer, the excluded cells (within the radius of a cell of the classes), shape = land_cover.shape
+    """
+    if method not in EXCLUSION_METHODS:
+        raise ValueError(f'Unknown exclusion method: {method}, expected one of {EXCLUSION_METHODS}')
+
+    radii_per_classes: Dict[FrozenSet[int], List[int]] = {}
+    for r, classes in buffers:
+        if r < 0:
+            raise ValueError(f'The exclusion radius must be >= 0, got {r}')
+        radii_per_classes.setdefault(frozenset(classes), []).append(r)
+
+    masks = {}
+    for classes, radii in radii_per_classes.items():
+        source = np.isin(land_cover, list(classes))
+        for r, mask in zip(radii, __buffer_masks(source, radii, method)):
+            masks[(classes, r)] = mask
+
+    return [masks[(frozenset(classes), r)] for r, classes in buffers]
+
+
+def __buffer_masks(source: np.ndarray, radii: List[int], method: str) -> List[np.ndarray]:
+    if not source.any():
+        return [np.zeros_like(source) for _ in radii]
+    if all(r == 0 for r in radii):
+        return [source.copy() for _ in radii]  # the disk of radius 0 is a single cell
+
+    if method == 'edt':
+        # distance from every cell to the nearest source cell; sqrt is correctly rounded, so comparing with the
+        # integer r is exact (same cells as dx² + dy² <= r²)
+        distance = ndimage.distance_transform_edt(~source)
+        return [distance <= r for r in radii]
+
+    if method == 'fft':
+        source_float = source.astype(float)
+        # the convolution counts the source cells within the disk; rounding errors are far below 0.5
+        return [signal.fftconvolve(source_float, disk_kernel(r).astype(float), mode='same') > 0.5 for r in radii]
+
+    return [ndimage.binary_dilation(source, disk_kernel(r)) for r in radii]
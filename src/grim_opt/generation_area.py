@@ -0,0 +1,76 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Area available for the generation technologies per region (region_area_generation), from the area per land cover class
+per region (region_area_land_cover_classes) and a suitability factor per land cover class and technology.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from grim_opt.config import GenerationAreaPaths
+from grim_opt.config_defaults import config_generation_area_default
+from grim_opt.helpers import get_region_names_list
+
+
+def perform_generation_area(
+        paths: GenerationAreaPaths,
+        suitability: Dict[str, Dict[int, float]],
+        cell_area: float,
+        ):
+    """
+    Perform the processing step in which the table of area per region per generation technology is generated:
+    area[region, technology] = cell_area * sum over the classes of cells[class, region] * suitability[technology][class]
+
+    :param paths: Struct with all the filepaths (input and output) needed for this processing step
+    :type paths: GenerationAreaPaths
+    :param suitability: Per technology, the suitable fraction of the area of each land cover class (grid code)
+    :type suitability: Dict[str, Dict[int, float]]
+    :param cell_area: Area of one cell of the land cover raster (km2)
+    :type cell_area: float
+
+    :return:
+    """
+    # number of cells per land cover class (rows) and region number (columns)
+    df_land_cover = pd.read_csv(paths.region_area_land_cover, index_col=0).fillna(0)
+    region_names_list = get_region_names_list(paths.region_names)
+
+    # suitability matrix, shape = (classes, technologies)
+    technologies = list(suitability.keys())
+    class_rows = {land_cover_class: i for i, land_cover_class in enumerate(df_land_cover.index)}
+    factors = np.zeros((len(class_rows), len(technologies)))
+    for k, technology in enumerate(technologies):
+        unknown = [c for c in suitability[technology] if c not in class_rows]
+        if unknown:
+            raise ValueError(f'Land cover classes {unknown} (suitability of {technology}) are not in '
+                             f'{paths.region_area_land_cover}')
+        for land_cover_class, factor in suitability[technology].items():
+            factors[class_rows[land_cover_class], k] = factor
+
+    # km2, shape = (regions, technologies)
+    area = cell_area * (df_land_cover.to_numpy(dtype=float).T @ factors)
+
+    regions = df_land_cover.columns.astype(int)
+    df = pd.DataFrame(area, index=regions, columns=technologies)
+    df.insert(0, 'region', [region_names_list[n] for n in regions])
+
+    # noinspection PyTypeChecker
+    df.to_csv(path_or_buf=paths.region_area_generation)
+
+
+def default_perform_generation_area():
+    perform_generation_area(
+        paths=config_generation_area_default.paths,
+        suitability=config_generation_area_default.suitability,
+        cell_area=config_generation_area_default.cell_area,
+    )
+
+
+if __name__ == '__main__':
+    default_perform_generation_area()
@@ -6,11 +6,38 @@
 #
 #  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import hashlib
+import warnings
+from functools import lru_cache
+from pathlib import Path
+
 import numpy as np
 import geojson
+import pyproj
+from shapely import wkb
 from shapely.geometry import Polygon
 import pandas as pd
-from shapely.ops import cascaded_union
+from shapely.ops import unary_union
+
+from grim_opt.cache import cache_dir, save_pickle_atomic
+
+
+@lru_cache(maxsize=None)
+def get_transformer(crs_from: str, crs_to: str) -> pyproj.Transformer:
+    """
+    Coordinate transformer between two CRSs, created only once per process and pair of CRSs.
+    Coordinates are always in (x, y) order, i.e. (lon, lat) for EPSG:4326, whatever the axis order of the CRS definition.
+    """
+    return pyproj.Transformer.from_crs(crs_from, crs_to, always_xy=True)
+
+
+def project_coords(coords, crs_from: str, crs_to: str) -> np.ndarray:
+    """
+    :param coords: Vertices, shape = (vertices, 2)
+    :return: The vertices in the coordinates of crs_to, shape = (vertices, 2)
+    """
+    coords = np.asarray(coords, dtype=float)
+    return np.column_stack(get_transformer(crs_from, crs_to).transform(coords[:, 0], coords[:, 1]))
 
 
 def get_region_names_list(path_region_names_csv):
@@ -25,9 +52,9 @@ def get_region_component_names(path_region_names_csv):
 
     region_names = {}
 
-    for column, content in df.iteritems():
+    for column, content in df.items():
         region_names[column] = []
-        for row, value in content.iteritems():
+        for row, value in content.items():
             if pd.notnull(value):
                 region_names[column].append(value)
 
@@ -35,31 +62,53 @@ def get_region_component_names(path_region_names_csv):
 
 
 def get_region_poly(path_gis_nlregions, path_region_names_csv):
+    """
+    Polygons of the regions, each the union of the polygons of its municipalities.
+
+    The merged polygons are stored in the on-disk cache (as WKB), keyed by the contents of both files, so they are only
+    computed once for all the steps (and runs) using the same files.
+
+    :return: The polygon of every region, by region name, in the order of the region names file
+    """
+    h = hashlib.sha256()
+    for path in (path_gis_nlregions, path_region_names_csv):
+        h.update(Path(path).read_bytes())
+    cached = cache_dir('regions') / f'{h.hexdigest()}.pkl'
+
+    if cached.exists():
+        region_wkbs = pd.read_pickle(cached)
+    else:
+        region_polys = __merge_region_polys(path_gis_nlregions, path_region_names_csv)
+        region_wkbs = pd.Series({key: wkb.dumps(polygon) for key, polygon in region_polys.items()}, dtype=object)
+        save_pickle_atomic(cached, region_wkbs)
+
+    # an empty polygon is read back as an empty collection
+    return {key: __polygon_or_empty(wkb.loads(value)) for key, value in region_wkbs.items()}
+
+
+def __polygon_or_empty(geometry):
+    return Polygon() if geometry.is_empty else geometry
+
+
+def __merge_region_polys(path_gis_nlregions, path_region_names_csv):
     municipality_polys = {}
 
     # https://gis.stackexchange.com/questions/93136/how-to-plot-geo-data-using-matplotlib-python
-    json_file = open(path_gis_nlregions, "r+", encoding="utf-8")
-    poly = geojson.load(json_file)
+    with open(path_gis_nlregions, "r", encoding="utf-8") as json_file:
+        poly = geojson.load(json_file)
 
     # create municipality polygons
-    i = 0
-    while i < np.array(poly["features"]).size:
-        if np.array(poly["features"][i]["geometry"]["coordinates"]).size != 2:
-            xy = np.squeeze(np.asarray(poly[i]["geometry"]["coordinates"]))
-            municipality_polys[poly["features"][i]["properties"]["name"]] = xy
-        i += 1
+    for feature in poly["features"]:
+        if np.array(feature["geometry"]["coordinates"]).size != 2:
+            xy = np.squeeze(np.asarray(feature["geometry"]["coordinates"]))
+            municipality_polys[feature["properties"]["name"]] = xy
 
     # create region names
     region_names = get_region_component_names(path_region_names_csv)
 
-    # merge
+    # merge, with a single union per region
     region_polys = {}
-    count = 0
     for key, value in region_names.items():
-        region_polys[key] = []
-        i = 0
-        polygons = Polygon()
-
         if key == "Groningen":
             polygons = Polygon(municipality_polys["Groningen"])
 
@@ -67,23 +116,14 @@ def get_region_poly(path_gis_nlregions, path_region_names_csv):
             polygons = Polygon(municipality_polys["Hoeksche_Waard"])
 
         else:
-            while i < len(value):
-                noMatch = 0
-                for key1, value1 in municipality_polys.items():
-                    if value[i] == key1:
-                        polygon1 = Polygon(value1)
-                        polygon1 = polygon1.buffer(0)
-                        polygons = cascaded_union([polygon1, polygons])
-                        polygons = polygons.buffer(0)
-                        noMatch = 1
-                        break
-                if noMatch == 0:
-                    count += 1
-                    print(value[i])
-                i += 1
+            parts = []
+            for name in value:
+                if name in municipality_polys:
+                    parts.append(Polygon(municipality_polys[name]).buffer(0))
+                else:
+                    warnings.warn(f'Municipality {name} of region {key} not found in {path_gis_nlregions}')
+            polygons = unary_union(parts).buffer(0) if parts else Polygon()
 
         region_polys[key] = polygons
 
-#    print("Missing municipalities = ", count)
-
     return region_polys
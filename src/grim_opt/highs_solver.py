@@ -0,0 +1,114 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+In-process HiGHS solver (through highspy) for the sparse LPs of `optimization_matrix`: the constraint matrix is handed
+over in memory, without writing any LP/MPS file.
+"""
+from typing import Dict
+
+import numpy as np
+
+from grim_opt.config import SolverParams
+from grim_opt.optimization_matrix import LinearProgram
+
+
+def highs_options(solver_params: SolverParams) -> Dict[str, object]:
+    """
+    Translate the solver knobs of the config (Gurobi conventions) into HiGHS options.
+
+    method: 0 = primal simplex, 1 = dual simplex, 2 = interior point (barrier); None lets HiGHS choose.
+    crossover: 0 disables the crossover after the interior point method; any other value enables it.
+    """
+    options = {}
+
+    if solver_params.method == 0:
+        options['solver'] = 'simplex'
+        options['simplex_strategy'] = 4  # primal
+    elif solver_params.method == 1:
+        options['solver'] = 'simplex'
+        options['simplex_strategy'] = 1  # dual (serial)
+    elif solver_params.method == 2:
+        options['solver'] = 'ipm'
+    elif solver_params.method is not None:
+        raise ValueError(f'Unknown solver method: {solver_params.method}')
+
+    if solver_params.crossover is not None:
+        options['run_crossover'] = 'off' if solver_params.crossover == 0 else 'on'
+
+    if solver_params.threads:
+        options['threads'] = solver_params.threads
+
+    return options
+
+
+class HighsSolver:
+    """
+    A HiGHS instance holding one LP. It is kept alive between solves, so that after changing a row (`replace_row`)
+    only that row is handed over again, not the whole model.
+    """
+
+    def __init__(self, lp: LinearProgram, solver_params: SolverParams):
+        import highspy  # optional dependency, only needed for this solver
+
+        self.__highs = highspy.Highs()
+        self.__highs.setOptionValue('output_flag', False)
+        for name, value in highs_options(solver_params).items():
+            self.__highs.setOptionValue(name, value)
+
+        model = highspy.HighsLp()
+        model.num_col_ = lp.A.shape[1]
+        model.num_row_ = lp.A.shape[0]
+        model.offset_ = lp.c0
+        model.col_cost_ = lp.c
+        model.col_lower_ = lp.col_lower
+        model.col_upper_ = lp.col_upper
+        model.row_lower_ = lp.row_lower
+        model.row_upper_ = lp.row_upper
+        model.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        model.a_matrix_.num_col_ = lp.A.shape[1]
+        model.a_matrix_.num_row_ = lp.A.shape[0]
+        model.a_matrix_.start_ = lp.A.indptr
+        model.a_matrix_.index_ = lp.A.indices
+        model.a_matrix_.value_ = lp.A.data
+        self.__highs.passModel(model)
+
+        self.__optimal = highspy.HighsModelStatus.kOptimal
+        self.__warm_start = solver_params.warm_start
+        # position of every row of `lp` in the solver (changes when rows are replaced)
+        self.__row_position = np.arange(lp.A.shape[0])
+
+    def replace_row(self, lp: LinearProgram, row: int):
+        """
+        Hand `row` of `lp.A` (e.g. after `set_res_share`) over to the solver again. The old row is deleted and the new
+        one appended in one call each, instead of changing its coefficients one by one: the solver keeps its rows in
+        a different order than `lp` from then on, which does not matter since only column values are read back.
+        """
+        position = self.__row_position[row]
+        self.__highs.deleteRows(1, np.array([position], dtype=np.int32))
+        self.__row_position[self.__row_position > position] -= 1
+        self.__row_position[row] = lp.A.shape[0] - 1
+
+        start, end = lp.A.indptr[row], lp.A.indptr[row + 1]
+        self.__highs.addRow(lp.row_lower[row], lp.row_upper[row], end - start,
+                            lp.A.indices[start:end].astype(np.int32), lp.A.data[start:end])
+
+    def solve(self) -> np.ndarray:
+        """
+        Unless `warm_start` is disabled in the solver params, the solve starts from the basis of the previous one
+        (after `replace_row` this is still a valid basis, with the new row basic).
+
+        :return: The optimal value of every column of the LP
+        """
+        if not self.__warm_start:
+            self.__highs.clearSolver()
+        self.__highs.run()
+        status = self.__highs.getModelStatus()
+        if status != self.__optimal:
+            raise RuntimeError(f'Optimization failed: {self.__highs.modelStatusToString(status)}')
+
+        return np.array(self.__highs.getSolution().col_value)
@@ -0,0 +1,116 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Ingest cache of the input files of the optimization step: each spreadsheet or CSV file is parsed once, and stored in
+the on-disk cache in a binary form which is much faster to load (pickled DataFrames for the tables, memory-mappable
+.npy arrays for the time series).
+
+An entry is keyed by the resolved path of the file, its modification time and its size (and by the parsing options),
+so editing or replacing an input file makes the next run parse it again.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from grim_opt.cache import cache_dir, save_pickle_atomic
+
+
+def read_excel_cached(path: Path, **kwargs) -> pd.DataFrame:
+    """
+    Same as `pd.read_excel(path, **kwargs)`, through the ingest cache
+    """
+    return __read_table_cached(path, pd.read_excel, kwargs)
+
+
+def read_csv_cached(path: Path, **kwargs) -> pd.DataFrame:
+    """
+    Same as `pd.read_csv(path, **kwargs)`, through the ingest cache
+    """
+    return __read_table_cached(path, pd.read_csv, kwargs)
+
+
+def read_time_series_cached(path: Path, chunk_rows: int = 100_000) -> Tuple[pd.Index, np.ndarray]:
+    """
+    Read a numeric CSV file with one row per time step, through the ingest cache.
+
+    On a cache miss the file is converted in chunks of `chunk_rows` rows, so that even multi-year files never need to
+    be held in memory at once.
+
+    :return: The column labels (as in `pd.read_csv(path).columns`), and the values as a read-only memory-mapped array,
+    shape = (time steps, columns). Only the rows actually used are read from disk.
+    """
+    key = __file_key(path, 'time_series', {})
+    values_path = cache_dir('inputs') / f'{key}.npy'
+    columns_path = cache_dir('inputs') / f'{key}.columns.pkl'
+
+    if not values_path.exists():
+        columns = pd.read_csv(path, nrows=0)
+        num_rows = sum(len(chunk.index) for chunk in pd.read_csv(path, usecols=[0], chunksize=chunk_rows))
+
+        tmp = values_path.with_name(f'{values_path.name}.{os.getpid()}.tmp')
+        values = np.lib.format.open_memmap(tmp, mode='w+', dtype=float, shape=(num_rows, len(columns.columns)))
+        start = 0
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            values[start:start + len(chunk.index)] = chunk.to_numpy(dtype=float)
+            start += len(chunk.index)
+        values.flush()
+        del values
+
+        save_pickle_atomic(columns_path, columns)  # written first: the .npy file marks a complete entry
+        os.replace(tmp, values_path)
+
+    return pd.read_pickle(columns_path).columns, np.load(values_path, mmap_mode='r')
+
+
+def cache_netcdf_variable(path: Path, variable: str, chunk_rows: int = 512) -> Path:
+    """
+    Copy a (2-D) variable of a netCDF file into the ingest cache as a .npy file, which can then be memory-mapped by
+    several processes at once (`np.load(..., mmap_mode='r')`) instead of each of them reading the netCDF file.
+    The copy is made in chunks of `chunk_rows` rows, and only on a cache miss.
+
+    :return: The path of the .npy file
+    """
+    from netCDF4 import Dataset  # only needed here
+
+    key = __file_key(path, 'netcdf', {'variable': variable})
+    values_path = cache_dir('inputs') / f'{key}.npy'
+
+    if not values_path.exists():
+        with Dataset(path, 'r') as nc_data:
+            var = nc_data[variable]
+            tmp = values_path.with_name(f'{values_path.name}.{os.getpid()}.tmp')
+            values = np.lib.format.open_memmap(tmp, mode='w+', dtype=var.dtype, shape=var.shape)
+            for start in range(0, var.shape[0], chunk_rows):
+                values[start:start + chunk_rows] = np.array(var[start:start + chunk_rows])
+            values.flush()
+            del values
+        os.replace(tmp, values_path)
+
+    return values_path
+
+
+def __read_table_cached(path: Path, reader, kwargs: dict) -> pd.DataFrame:
+    key = __file_key(path, reader.__name__, kwargs)
+    cached = cache_dir('inputs') / f'{key}.pkl'
+    if cached.exists():
+        return pd.read_pickle(cached)
+
+    df = reader(path, **kwargs)
+    save_pickle_atomic(cached, df)
+    return df
+
+
+def __file_key(path: Path, kind: str, kwargs: dict) -> str:
+    path = Path(path).resolve()
+    stat = path.stat()
+    description = f'{path}|{stat.st_mtime_ns}|{stat.st_size}|{kind}|{sorted(kwargs.items())}|{pd.__version__}'
+    return hashlib.sha256(description.encode()).hexdigest()
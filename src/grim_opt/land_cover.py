@@ -5,26 +5,38 @@
 #  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
 #
 #  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
-from typing import Tuple, List
+import hashlib
+import multiprocessing
+from pathlib import Path
+from typing import Tuple, List, Optional
 
 import numpy as np
-import numpy.ma as ma
 import pandas as pd
 import geojson
-import pyproj
-import matplotlib.path as mp
 from netCDF4 import Dataset
 from shapely.geometry import Polygon
-from scipy import ndimage
 
-from grim_opt.config import LandCoverPaths
+from grim_opt.cache import cache_dir, hash_arrays, save_pickle_atomic
+from grim_opt.config import LandCoverPaths, LandCoverVariant
 from grim_opt.config_defaults import config_land_cover_default
-from grim_opt.helpers import get_region_names_list, get_region_poly
+from grim_opt.exclusion import exclusion_masks
+from grim_opt.input_cache import cache_netcdf_variable
+from grim_opt.helpers import get_region_names_list, get_region_poly, project_coords
+from grim_opt.path_helpers import variant_path
+from grim_opt.rasterize import rasterize_polygons
+
+RASTER_CRS = 'EPSG:3035'  # x, y of the CORINE land cover raster
+STATE_COLUMNS = ('fingerprint', 'xmin', 'xmax', 'ymin', 'ymax')  # per region, followed by the counts
+DEFAULT_PARALLEL_TILE_SIZE = 1024
 
 
 def perform_land_cover(
         paths: LandCoverPaths,
-        out_shp: Tuple[int, int], r: int, class_artificial_indices: List[int]
+        out_shp: Tuple[int, int], r: int, class_artificial_indices: List[int],
+        tile_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        exclusion_method: str = 'edt',
+        variants: Optional[List[LandCoverVariant]] = None,
         ):
     """
     Perform the pre-processing step in which the table of area per region per land cover class is generated
@@ -32,11 +44,29 @@ def perform_land_cover(
     :param paths Struct with all the filepaths (input and output) needed for this processing step
     :type paths LandCoverPaths
 
-    :param out_shp: Output array shape (two-dimensional)
+    :param out_shp: Output array shape (two-dimensional), i.e. the shape of the land cover raster
     :type out_shp: Tuple[int, int]
     :param r: Radius of circles
     :type r: int
     :param class_artificial_indices: Exclude land cover class:artificial surfaces
+    :param tile_size: If given, the raster is read and processed in square tiles of (at most) this many cells per side,
+    which bounds the memory used. None processes the whole raster at once. The result is the same in both cases.
+    :type tile_size: Optional[int]
+    :param workers: If given (> 1), the tiles are processed in parallel by this many worker processes, which share the
+    raster through a memory-mapped copy in the cache. The result is the same as with a single process.
+    :type workers: Optional[int]
+    :param exclusion_method: How the cells within r of the artificial surfaces are found, see
+    `exclusion.exclusion_masks`. All the methods give the same result.
+    :type exclusion_method: str
+    :param variants: Other (radius, excluded classes) combinations, each written to its own table (see
+    `variant_path`) in addition to the one of r and class_artificial_indices. The raster, the projection and the
+    rasterization of the regions are shared by all of them.
+    :type variants: Optional[List[LandCoverVariant]]
+
+    The counts of every region are kept in the cache, with a fingerprint of its polygon, for the raster and the
+    settings used. A later run with the same raster and settings only recomputes the regions whose polygon changed
+    (e.g. after moving a municipality to another region), together with the regions overlapping their bounding boxes,
+    and each over the window of its bounding box only.
 
     :return:
     """
@@ -48,83 +78,250 @@ def perform_land_cover(
 
     json_file = open(paths.exclusion_poly, 'r+', encoding='utf-8')  # this is a special polygon
 
-    # coordinate transforms (projection)
-    EPSG3035 = pyproj.Proj("EPSG:3035")  # Was +init=EPSG:3035, library DeprecationWarning forced change
-    EPSG4326 = pyproj.Proj("EPSG:4326")  # Was +init=EPSG:4326, library DeprecationWarning forced change
-
     row_names = [1, 2, 3, 7, 8, 9, 12, 15, 16, 18, 20, 21, 23, 24, 25, 26, 27, 29, 30, 32, 35, 36, 37]
 
-    # mask unavailable points
-    land_cover_unmasked = np.array(nc_data['data'])
-    land_cover_masked = ma.masked_array(land_cover_unmasked, fill_value=False)
     y = np.array(nc_data['y'])  # with dimension y.shape
     x = np.array(nc_data['x'])  # with dimension x.shape
+    if tuple(nc_data['data'].shape) != tuple(out_shp):
+        raise ValueError(f'The land cover raster has shape {nc_data["data"].shape}, expected out_shp = {out_shp}')
 
-    # coordinate transformation
-    # pyproj requires same dimension
-    # create a meshgrid based on x, y
-    xg, yg = np.meshgrid(x, y)
-    lon, lat = pyproj.transform(EPSG3035, EPSG4326, xg, yg)
-
-    # from lon, lat meshgrid to points with (lon,lat)
-    points = np.array((lon.flatten(), lat.flatten())).transpose()
+    # coordinate transformation (projection) of the polygon vertices (lon, lat) into the coordinates of the raster;
+    # the raster itself is never transformed
+    def to_raster(coords):
+        return project_coords(coords, 'EPSG:4326', RASTER_CRS)
 
     # polygon Veluwe
     poly = geojson.load(json_file)
     poly_veluwe = np.squeeze(np.array(poly["coordinates"]))
     exterior_veluwe = Polygon(poly_veluwe).buffer(0).exterior.coords[:]
-    boolean_veluwe = mp.Path(np.asarray(exterior_veluwe)).contains_points(points).reshape(y.size, x.size)  # inside True
+    ring_veluwe = to_raster(exterior_veluwe)
+
+    # region polygons, labelled with their region number
+    region_shapes = [
+        (region_names_list.index(key), to_raster(polygon.exterior.coords)) for key, polygon in region_polys.items()
+    ]
+
+    variants = variants or []
+    buffers = [(r, class_artificial_indices)] + [(v.r, v.class_artificial_indices) for v in variants]
+    out_paths = [paths.region_area_land_cover] + [variant_path(paths.region_area_land_cover, v.name) for v in variants]
+    if len(set(out_paths)) != len(out_paths):
+        raise ValueError(f'The names of the land cover variants must be unique: {[v.name for v in variants]}')
+
+    # the counts of the previous run with the same raster and settings are reused for the regions whose polygon did
+    # not change, and which do not overlap (the bounding box of) a changed region
+    region_keys = list(region_polys.keys())
+    fingerprints = {key: hash_arrays(ring) for key, (_, ring) in zip(region_keys, region_shapes)}
+    bboxes = {key: __ring_bbox(ring) for key, (_, ring) in zip(region_keys, region_shapes)}
+    settings = __settings_fingerprint(paths, region_names_list, ring_veluwe, buffers, row_names)
+    state_path = cache_dir('land_cover') / f'{settings}.pkl'
+    previous = pd.read_pickle(state_path) if state_path.exists() else None
+    dirty = __dirty_regions(previous, fingerprints, bboxes)
+
+    # the raster is processed tile by tile (a single tile if no tile size is given), accumulating the counts;
+    # a job (rows, cols, label) only counts the region label, or all the regions if label is None
+    parallel = workers is not None and workers > 1
+    tile = tile_size or (DEFAULT_PARALLEL_TILE_SIZE if parallel else max(y.size, x.size))
+    if dirty is None:
+        jobs = [(rows, cols, None) for rows, cols in __tiles((0, y.size), (0, x.size), tile)]
+    else:
+        # only the window of the bounding box of every region to recompute
+        jobs = [
+            (rows, cols, region_names_list.index(key))
+            for key in dirty for rows, cols in __tiles(*__bbox_window(bboxes[key], x, y), tile)
+        ]
+
+    tile_args = (
+        x, y, buffers, exclusion_method,
+        region_shapes, ring_veluwe, row_names, len(region_names_list),
+    )
+
+    counts = np.zeros((len(buffers), len(region_names_list), len(row_names)), dtype=np.int64)
+    if dirty is not None:
+        count_columns = previous.columns.drop(list(STATE_COLUMNS))
+        for key in region_keys:
+            if key not in dirty:
+                counts[:, region_names_list.index(key)] = \
+                    previous.loc[key, count_columns].to_numpy(dtype=np.int64).reshape(len(buffers), len(row_names))
+
+    if parallel and jobs:
+        # the workers memory-map the raster, so it is neither pickled nor read from the netCDF file by each of them
+        raster_path = cache_netcdf_variable(paths.corine_land_cover, 'data')
+        ctx = multiprocessing.get_context('spawn')
+        pool = ctx.Pool(processes=workers, initializer=_init_tile_worker, initargs=(raster_path, tile_args))
+        job_counts = pool.imap(_count_tile_task, [(rows, cols) for rows, cols, _ in jobs])
+    else:
+        pool = None
+        job_counts = (__count_tile(nc_data['data'], rows, cols, *tile_args) for rows, cols, _ in jobs)
+
+    for (_, _, label), partial_counts in zip(jobs, job_counts):
+        if label is None:
+            counts += partial_counts
+        else:
+            counts[:, label] += partial_counts[:, label]
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    # state of this run: one row per region
+    labels = [region_names_list.index(key) for key in region_keys]
+    state = pd.DataFrame(counts[:, labels].transpose(1, 0, 2).reshape(len(region_keys), -1), index=region_keys)
+    state.insert(0, 'fingerprint', [fingerprints[key] for key in region_keys])
+    for k, column in enumerate(STATE_COLUMNS[1:]):
+        state.insert(k + 1, column, [bboxes[key][k] for key in region_keys])
+    save_pickle_atomic(state_path, state)
+
+    for buffer_counts, out_path in zip(counts, out_paths):
+        # create a dataframe to storedata
+        df = pd.DataFrame(columns=np.arange(30), index=row_names)
+
+        for key in region_polys.keys():
+            region_num = region_names_list.index(key)
+            df[region_num] = buffer_counts[region_num]
+
+        # noinspection PyTypeChecker
+        df.to_csv(path_or_buf=out_path)
+
+
+def __settings_fingerprint(
+        paths: LandCoverPaths, region_names_list: List[str], ring_veluwe: np.ndarray,
+        buffers: List[Tuple[int, List[int]]], row_names: List[int],
+        ) -> str:
+    """
+    :return: Hash of everything the counts of a region depend on, apart from the polygons of the regions
+    """
+    raster = Path(paths.corine_land_cover).resolve()
+    stat = raster.stat()
+    normalized_buffers = [(int(buffer_r), sorted(int(c) for c in classes)) for buffer_r, classes in buffers]
+    description = f'{raster}|{stat.st_mtime_ns}|{stat.st_size}|{region_names_list}|{normalized_buffers}|{row_names}'
+    return hashlib.sha256(f'{description}|{hash_arrays(ring_veluwe)}'.encode()).hexdigest()
+
 
-    # exclude land cover class:artificial surfaces
-    invalid_ = np.in1d(land_cover_masked[:][:], class_artificial_indices)
-    invalid = invalid_.reshape(y.size, x.size)
+def __ring_bbox(ring: np.ndarray) -> Tuple[float, float, float, float]:
+    return ring[:, 0].min(), ring[:, 0].max(), ring[:, 1].min(), ring[:, 1].max()
 
-    # find the indice of these points
-    result = np.where(invalid)
-    points_indice = list(zip(result[0], result[1]))
 
-    maskcenters = np.asarray(points_indice)
+def __bboxes_intersect(a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]) -> bool:
+    return a[0] <= b[1] and b[0] <= a[1] and a[2] <= b[3] and b[2] <= a[3]
 
-    # Get a disk kernel
-    X, Y = [np.arange(-r, r+1)]*2
-    disk_mask = X[:, None]**2 + Y**2 <= r*r
-    # Ridx, Cidx = np.where(disk_mask)  # TODO: is this used? when?
 
-    # Initialize output array and set the maskcenters as 1s
-    out = np.zeros(out_shp, dtype=bool)
-    out[maskcenters[:, 0], maskcenters[:, 1]] = 1
+def __dirty_regions(previous: Optional[pd.DataFrame], fingerprints: dict, bboxes: dict) -> Optional[List[str]]:
+    """
+    :param previous: The state of the previous run (fingerprint, bounding box and counts of every region), if any
+    :return: The regions to recompute, or None for all of them (no previous run). A region is recomputed if its polygon
+    changed, or if its bounding box intersects the old or new bounding box of a changed (or removed) region, since
+    overlapping polygons share cells.
+    """
+    if previous is None:
+        return None
+
+    changed = [
+        key for key in fingerprints
+        if key not in previous.index or previous.at[key, 'fingerprint'] != fingerprints[key]
+    ]
+    changed_bboxes = [bboxes[key] for key in changed] + [
+        tuple(previous.loc[key, list(STATE_COLUMNS[1:])]) for key in previous.index
+        if key not in fingerprints or key in changed
+    ]
+
+    return [
+        key for key in fingerprints
+        if key in changed or any(__bboxes_intersect(bboxes[key], bbox) for bbox in changed_bboxes)
+    ]
+
+
+def __bbox_window(bbox: Tuple[float, float, float, float], x: np.ndarray, y: np.ndarray
+                  ) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """
+    :return: The rows and columns of the raster cells whose centers are in the bounding box (empty if none)
+    """
+    rows = np.nonzero((y >= bbox[2]) & (y <= bbox[3]))[0]
+    cols = np.nonzero((x >= bbox[0]) & (x <= bbox[1]))[0]
+    if rows.size == 0 or cols.size == 0:
+        return (0, 0), (0, 0)
+    return (rows[0], rows[-1] + 1), (cols[0], cols[-1] + 1)
 
-    # Use binary dilation to get the desired output
-    out = ndimage.binary_dilation(out, disk_mask)
 
-    land_cover_masked.mask = out | land_cover_masked.mask
+def __tiles(rows: Tuple[int, int], cols: Tuple[int, int], tile: int
+            ) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    return [
+        ((i0, min(i0 + tile, rows[1])), (j0, min(j0 + tile, cols[1])))
+        for i0 in range(rows[0], rows[1], tile) for j0 in range(cols[0], cols[1], tile)
+    ]
 
-    # create a dataframe to storedata
-    df = pd.DataFrame(columns=np.arange(30), index=row_names)
 
-    for key, value in region_polys.items():
-        print(key)
-        polygon = value
+_tile_worker_state = {}
 
-        region_num = None
-        for i, v in enumerate(region_names_list):
-            if key == v:
-                region_num = i
-                break
 
-        print(region_num)
+def _init_tile_worker(raster_path: Path, tile_args: tuple):
+    _tile_worker_state['data'] = np.load(raster_path, mmap_mode='r')
+    _tile_worker_state['tile_args'] = tile_args
 
-        # points inside the region = True
-        boolean_region = mp.Path(polygon.exterior.coords[:]).contains_points(points).reshape(y.size, x.size)
 
-        land_cover_region = land_cover_masked.copy()
-        land_cover_region.mask = ~boolean_region | boolean_veluwe | land_cover_masked.mask
+def _count_tile_task(tile: Tuple[Tuple[int, int], Tuple[int, int]]) -> np.ndarray:
+    rows, cols = tile
+    return __count_tile(_tile_worker_state['data'], rows, cols, *_tile_worker_state['tile_args'])
 
-        for i in np.arange(len(row_names)):
-            df.loc[row_names[i]][region_num] = np.count_nonzero(land_cover_region == row_names[i])
 
-    # noinspection PyTypeChecker
-    df.to_csv(path_or_buf=paths.region_area_land_cover)
+def __count_tile(
+        data, rows: Tuple[int, int], cols: Tuple[int, int], x: np.ndarray, y: np.ndarray,
+        buffers: List[Tuple[int, List[int]]], exclusion_method: str,
+        region_shapes, ring_veluwe: np.ndarray, row_names: List[int], num_regions: int,
+        ) -> np.ndarray:
+    """
+    Count the available pixels of every (region, class) pair within the tile rows[0]:rows[1], cols[0]:cols[1], for
+    every exclusion buffer. A pixel inside several (overlapping) regions is counted for each of them.
+
+    The tile is read with a halo of (the largest) r cells on every side, so that the exclusion around artificial
+    surfaces near the edges of the tile is the same as when computing it on the whole raster at once.
+
+    :param data: The land cover raster (e.g. a netCDF variable), only the tile and its halo are read
+    :param buffers: (r, class_artificial_indices) of every table
+    :return: The counts, shape = (len(buffers), num_regions, len(row_names))
+    """
+    (i0, i1), (j0, j1) = rows, cols
+    r = max(buffer_r for buffer_r, _ in buffers)
+    a0, a1 = max(i0 - r, 0), min(i1 + r, y.size)
+    b0, b1 = max(j0 - r, 0), min(j1 + r, x.size)
+    land_cover = np.array(data[a0:a1, b0:b1])
+
+    # exclude land cover class:artificial surfaces, and their surroundings
+    excluded = exclusion_masks(land_cover, buffers, exclusion_method)
+    land_cover = land_cover[i0 - a0:i1 - a0, j0 - b0:j1 - b0]
+
+    # regions burned into one grid of region numbers (-1 outside all regions), and the Veluwe
+    overlaps = []
+    region_labels = rasterize_polygons(region_shapes, x[j0:j1], y[i0:i1], overlaps=overlaps)
+    boolean_veluwe = rasterize_polygons([(1, ring_veluwe)], x[j0:j1], y[i0:i1]) == 1  # inside True
+
+    # (cell, region) of every pixel which is counted unless excluded, shared by all the buffers
+    candidate = ((region_labels >= 0) & ~boolean_veluwe).ravel()
+    cells = np.flatnonzero(candidate)
+    regions = region_labels.ravel()[cells].astype(np.int64)
+    if overlaps:
+        # a cell inside several regions is counted for each of them, not only for the last one burned into the grid
+        lost_regions = np.concatenate([lost for lost, _ in overlaps]).astype(np.int64)
+        lost_cells = np.concatenate([lost for _, lost in overlaps])
+        keep = candidate[lost_cells]
+        cell_regions = np.unique(np.concatenate([
+            cells * num_regions + regions, lost_cells[keep] * num_regions + lost_regions[keep],
+        ]))
+        cells, regions = np.divmod(cell_regions, num_regions)
+    classes = land_cover.ravel()[cells]
+
+    class_index = np.full(max(int(classes.max(initial=0)), max(row_names)) + 1, -1)  # class -> row, -1 not counted
+    class_index[row_names] = np.arange(len(row_names))
+    counted = (classes >= 0) & (class_index[np.maximum(classes, 0)] >= 0)
+    pairs = np.where(counted, regions * len(row_names) + class_index[np.maximum(classes, 0)], -1)
+
+    # count the pixels of every (region, class) pair in one pass over the available pixels, for every buffer
+    counts = np.empty((len(buffers), num_regions, len(row_names)), dtype=np.int64)
+    for k, buffer_excluded in enumerate(excluded):
+        available = ~buffer_excluded[i0 - a0:i1 - a0, j0 - b0:j1 - b0].ravel()[cells] & (pairs >= 0)
+        counts[k] = np.bincount(
+            pairs[available], minlength=num_regions * len(row_names),
+        ).reshape(num_regions, len(row_names))
+    return counts
 
 
 def default_perform_land_cover():
@@ -133,6 +330,10 @@ def default_perform_land_cover():
         out_shp=config_land_cover_default.out_shp,
         r=config_land_cover_default.r,
         class_artificial_indices=config_land_cover_default.class_artificial_indices,
+        tile_size=config_land_cover_default.tile_size,
+        workers=config_land_cover_default.workers,
+        exclusion_method=config_land_cover_default.exclusion_method,
+        variants=config_land_cover_default.variants,
     )
 
 
@@ -5,13 +5,24 @@
 #  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
 #
 #  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
-import pandas as pd
+from dataclasses import replace
+from typing import List, Optional, Tuple
+
 import numpy as np
-from numpy.linalg import inv, multi_dot
-from pyomo.environ import NonNegativeReals, Var, ConcreteModel, Objective, Constraint, SolverFactory
+import pandas as pd
+from pyomo.environ import NonNegativeReals, NonPositiveReals, Reals, Var, ConcreteModel, Objective, Constraint, \
+    SolverFactory, Param
+from pyomo.contrib.appsi.base import PersistentSolver as AppsiPersistentSolver
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
 
-from grim_opt.config import OptimizationPaths, EnergyTechParams, SolverParams, OptOtherParams
+from grim_opt.config import OptimizationPaths, EnergyTechParams, SolverParams, OptOtherParams, OptFormulationParams, \
+    OptAggregationParams
 from grim_opt.config_defaults import config_optimization_default
+from grim_opt.highs_solver import HighsSolver, highs_options
+from grim_opt.optimization_inputs import OptimizationInputs, RepresentativePeriods, read_optimization_inputs
+from grim_opt.optimization_matrix import build_linear_program, solve_linear_program, set_res_share
+from grim_opt.ptdf import sparsify_ptdf, flow_nonzeros_per_time_step
+from grim_opt.time_aggregation import aggregate_inputs
 
 
 def perform_optimization(
@@ -20,6 +31,8 @@ def perform_optimization(
         solver_params: SolverParams,
         num_rows_cost_params: int,
         other_params: OptOtherParams,
+        formulation_params: OptFormulationParams,
+        aggregation_params: Optional[OptAggregationParams],
         ):
     """
     Perform the optimization step in which the investments for renewable energy generation and transmission are calculated.
@@ -30,9 +43,159 @@ def perform_optimization(
     :param solver_params:
     :param num_rows_cost_params: Number of rows in the cost parameters spreadsheet
     :param other_params:
+    :param formulation_params: Choice of model builder (Pyomo rules or sparse matrix blocks)
+    :param aggregation_params: If not None, the time series are first reduced to a few representative periods
+    :type aggregation_params: Optional[OptAggregationParams]
 
     :return:
     """
+    __optimize_omegas(
+        [(other_params.omega, paths)],
+        paths, et_params, solver_params, num_rows_cost_params, other_params, formulation_params, aggregation_params,
+    )
+
+
+def perform_optimization_sweep(
+        paths: OptimizationPaths,
+        et_params: EnergyTechParams,
+        solver_params: SolverParams,
+        num_rows_cost_params: int,
+        other_params: OptOtherParams,
+        formulation_params: OptFormulationParams,
+        aggregation_params: Optional[OptAggregationParams],
+        omegas: List[float],
+        ):
+    """
+    Perform the optimization step for several values of the renewable energy target (omega), in a single process.
+    The inputs are read and the model is built only once; between solves only the RES share constraint changes,
+    and each solve is warm-started from the previous one whenever the solver supports it: persistent Pyomo solvers
+    (APPSI ones such as `appsi_highs`, i.e. 'highs', and legacy ones such as `gurobi_persistent`), and the in-process
+    HiGHS of the `matrix` model builder (`solver_params.name == 'highs'`) unless `solver_params.warm_start` is disabled.
+    Other solvers (e.g. `glpk`, and SciPy's HiGHS of the `matrix` builder) fall back to a cold solve of the whole model
+    for every omega.
+
+    The outputs for each omega are written next to `paths.optimized_gencap_renew` and `paths.optimized_transcap_renew`,
+    with the conventional per-omega file names (`optimized_gencap_{pct}%_renew`, `optimized_transcap_{pct}%_renew`).
+
+    :param omegas: Values of omega (0 - 1), solved in the given order
+    :type omegas: List[float]
+    (all other parameters: same as `perform_optimization`)
+
+    :return:
+    """
+    __optimize_omegas(
+        [(omega, paths.for_omega(omega)) for omega in omegas],
+        paths, et_params, solver_params, num_rows_cost_params, other_params, formulation_params, aggregation_params,
+    )
+
+
+def __optimize_omegas(
+        runs: List[Tuple[float, OptimizationPaths]],
+        paths: OptimizationPaths,
+        et_params: EnergyTechParams,
+        solver_params: SolverParams,
+        num_rows_cost_params: int,
+        other_params: OptOtherParams,
+        formulation_params: OptFormulationParams,
+        aggregation_params: Optional[OptAggregationParams],
+        ):
+    inputs = read_optimization_inputs(paths, et_params, num_rows_cost_params, other_params)
+    if aggregation_params is not None:
+        inputs, other_params = aggregate_inputs(inputs, et_params.N, other_params, aggregation_params)
+    inputs, formulation_params = __prepare_flow_formulation(inputs, et_params, formulation_params)
+
+    if formulation_params.model_builder == 'pyomo':
+        model = build_pyomo_model(inputs, et_params, other_params, formulation_params)
+        print('Model building finished!')
+        opt = make_pyomo_solver(solver_params)
+        legacy_persistent = isinstance(opt, PersistentSolver)
+        if legacy_persistent:
+            opt.set_instance(model)
+
+        for omega, run_paths in runs:
+            model.omega.set_value(omega)
+            if isinstance(opt, AppsiPersistentSolver):
+                # APPSI solvers (e.g. appsi_highs) keep the model, and detect that the mutable omega changed: only the
+                # coefficients of RES_share_rule are updated, and the solve starts from the previous basis
+                opt.solve(model)
+            elif legacy_persistent:
+                # these do not track mutable Params: omega is a coefficient of this constraint, so it must be handed
+                # to the solver again
+                opt.remove_constraint(model.RES_share_rule)
+                opt.add_constraint(model.RES_share_rule)
+                opt.solve()
+            else:
+                # not persistent (e.g. glpk): the model is written out again and solved from scratch
+                opt.solve(model)
+            print(f'Model solved! (omega = {omega})')
+            write_optimization_outputs(run_paths, evaluation(model.K), evaluation(model.K_T))
+
+    elif formulation_params.model_builder == 'matrix':
+        lp = build_linear_program(inputs, et_params, other_params, formulation_params)
+        print('Model building finished!')
+        # 'highs': in-process HiGHS instance kept between solves; otherwise, SciPy's HiGHS from scratch for every omega
+        highs = HighsSolver(lp, solver_params) if solver_params.name == 'highs' else None
+
+        for omega, run_paths in runs:
+            set_res_share(lp, et_params, omega)
+            if highs is not None:
+                highs.replace_row(lp, lp.row_blocks['RES_share_rule'][0])
+                solution = highs.solve()
+            else:
+                solution = solve_linear_program(lp, solver_params)
+            print(f'Model solved! (omega = {omega})')
+            write_optimization_outputs(run_paths, lp.block_values('K', solution), lp.block_values('K_T', solution))
+
+    else:
+        raise ValueError(f'Unknown model builder: "{formulation_params.model_builder}"')
+
+
+def __prepare_flow_formulation(
+        inputs: OptimizationInputs, et_params: EnergyTechParams, formulation_params: OptFormulationParams,
+        ) -> Tuple[OptimizationInputs, OptFormulationParams]:
+    """
+    Apply the PTDF threshold, and resolve the 'auto' flow formulation to the one with the fewest nonzeros in the model
+    that is actually built (with or without the eliminated auxiliary variables)
+    """
+    if formulation_params.ptdf_threshold > 0:
+        PTDF = sparsify_ptdf(inputs.PTDF, formulation_params.ptdf_threshold)
+        print(f'PTDF threshold {formulation_params.ptdf_threshold}: '
+              f'{np.count_nonzero(inputs.PTDF)} -> {np.count_nonzero(PTDF)} nonzero entries')
+        inputs = replace(inputs, PTDF=PTDF)
+
+    if formulation_params.flow_formulation == 'auto':
+        nonzeros = flow_nonzeros_per_time_step(inputs.PTDF[et_params.FL], len(et_params.FL), len(et_params.N),
+                                               formulation_params.eliminate_auxiliary)
+        flow_formulation = min(nonzeros, key=nonzeros.get)
+        print(f'Flow formulation: {flow_formulation} (nonzeros per time step: {nonzeros})')
+        formulation_params = replace(formulation_params, flow_formulation=flow_formulation)
+
+    return inputs, formulation_params
+
+
+def evaluation(indexedvar) -> pd.Series:
+    """
+    Values of an indexed Pyomo variable, as a Series indexed by the (possibly multi-dimensional) variable index
+    """
+    return pd.Series(indexedvar.get_values())
+
+
+def write_optimization_outputs(paths: OptimizationPaths, gencap: pd.Series, transcap: pd.Series):
+    # noinspection PyTypeChecker
+    gencap.unstack().to_csv(paths.optimized_gencap_renew)
+    # noinspection PyTypeChecker
+    transcap.to_csv(paths.optimized_transcap_renew)
+
+
+def build_pyomo_model(
+        inputs: OptimizationInputs,
+        et_params: EnergyTechParams,
+        other_params: OptOtherParams,
+        formulation_params: OptFormulationParams,
+        ) -> ConcreteModel:
+    """
+    Build the investment model as a Pyomo ConcreteModel, with one Python rule callback per constraint family.
+    """
     # Unpack here to avoid long and verbose variable names from here onwards
     N = et_params.N
     FL = et_params.FL
@@ -56,61 +219,21 @@ def perform_optimization(
     S = SC
     # VRES = ['onshore', 'solar']
 
-    # cost parameters
-    df_parameters = pd.read_excel(paths.params_techno_econ, index_col=0)
-    C = {i: num_rows_cost_params * df_parameters.loc[i, 'CapEx(€/kW)'] for i in (G + SC)}
-    C_S = {i: num_rows_cost_params * df_parameters.loc[i, 'CapExStorage(€/kWh)'] for i in S}  # €/MW
-    a = {i: num_rows_cost_params * df_parameters.loc[i, 'FOM(€/kW/yr)'] for i in (G + SC)}  # €/MW/yr
-    b = {i: num_rows_cost_params * df_parameters.loc[i, 'VOM(€/kWh)'] for i in G}  # €/MWh
-    L = {i: df_parameters.loc[i, 'Lifetime(yr)'] for i in (G + SC + S)}
-    # e = {i: df_parameters.loc[i, 'Pollution(tCO2/MWh)'] for i in G}  # TODO: is this used? when?
-    # eta = {i: df_parameters.loc[i, 'eta'] for i in G}  # TODO: is this used? when?
-    eta_in = {i: df_parameters.loc[i, 'eta_in'] for i in SC}
-    eta_out = {i: df_parameters.loc[i, 'eta_out'] for i in SC}
-
-    # land-use data
-    df_KM = pd.read_csv(paths.region_area_generation, index_col=0)
-    KM_onshore = {n: df_KM.loc[n, 'wind'] for n in N}
-    KM_solar = {n: df_KM.loc[n, 'solar'] for n in N}
-    capacity_density_onshore = 5  # MW/km2
-    capacity_density_solar = 30  # MW/km2
-
-    # existing generation capacity
-    df_generation = pd.read_excel(paths.gencap_existing)
-    existing_capacity = df_generation.fillna(0)
-
-    # create PTDF
-    df = pd.read_csv(paths.transcap_connections)
-    im = np.zeros([len(df.index), 32])
-
-    for line in df.index:
-        im[line, df.loc[line, 'region1']] = 1
-        im[line, df.loc[line, 'region2']] = -1
-
-    A = im
-    Bd = np.diag([1 / x for x in df['x']])
-    M1 = multi_dot([Bd, A])
-    M2 = multi_dot([A.transpose(), Bd, A])
-    # node 0 is slack node
-    PTDF_slack = multi_dot([M1[:, 1:], inv(M2[1:, 1:])])
-    PTDF = np.hstack((np.zeros([len(df.index), 1]), PTDF_slack))
-
-    existing_line = df['capacity']
-    distance = df['length']
-
-    # time-series data
-    df_demand = pd.read_csv(paths.electricity_demand)  # MWh
-    df_onshore = pd.read_csv(paths.electricity_gencap_factors_new_wind)
-    df_solar = pd.read_csv(paths.electricity_gencap_factors_new_solar)
-
-    arr_demand = np.empty([32, denominator_R])
-    arr_onshore = np.empty([32, denominator_R])
-    arr_solar = np.empty([32, denominator_R])
-
-    for n in N:
-        arr_demand[n, :] = df_demand[str(n)]
-        arr_onshore[n, :] = df_onshore[str(n)]
-        arr_solar[n, :] = df_solar[str(n)]
+    C, C_S, a, b, L = inputs.C, inputs.C_S, inputs.a, inputs.b, inputs.L
+    eta_in, eta_out = inputs.eta_in, inputs.eta_out
+    KM_onshore, KM_solar = inputs.KM_onshore, inputs.KM_solar
+    capacity_density_onshore = inputs.capacity_density_onshore
+    capacity_density_solar = inputs.capacity_density_solar
+    existing_capacity = inputs.existing_capacity
+    PTDF = inputs.PTDF
+    line_from, line_to, line_x = inputs.line_from, inputs.line_to, inputs.line_x
+    lines_out = {n: [ell for ell in FL if line_from[ell] == n] for n in N}
+    lines_in = {n: [ell for ell in FL if line_to[ell] == n] for n in N}
+    existing_line = inputs.existing_line
+    distance = inputs.distance
+    arr_demand, arr_onshore, arr_solar = inputs.arr_demand, inputs.arr_onshore, inputs.arr_solar
+    periods = inputs.periods
+    w = inputs.hour_weights(T)  # weight of each time step, all 1 unless representative periods are used
 
     # create optimization model
     model = ConcreteModel()
@@ -122,10 +245,23 @@ def perform_optimization(
     model.lol = Var(N, T, domain=NonNegativeReals)
     model.DP = Var(SC, N, T, domain=NonNegativeReals)
     model.CP = Var(SC, N, T, domain=NonNegativeReals)
-    model.SP = Var(S, N, T, domain=NonNegativeReals)
+    # with representative periods, SP is the state of charge relative to the start of the period (see SP_inter)
+    model.SP = Var(S, N, T, domain=NonNegativeReals if periods is None else Reals)
     model.K_T = Var(FL, domain=NonNegativeReals)  # FL is flow connections, in terms of numbers
-    model.F = Var(FL, T)
-    model.Z_net = Var(N, T)
+    flow_formulation = formulation_params.flow_formulation
+    eliminate = formulation_params.eliminate_auxiliary
+    # F (and, with the angle formulation, Z_net) can be substituted by their defining expressions, see flow and net
+    if not eliminate:
+        model.F = Var(FL, T)
+    if not (eliminate and flow_formulation == 'angle'):
+        model.Z_net = Var(N, T)
+    if flow_formulation == 'angle':
+        model.theta = Var(N, T)  # voltage angles
+        for t in T:
+            model.theta[N[0], t].fix(0)  # slack node
+
+    # mutable, so that a sweep over omega can reuse the same model
+    model.omega = Param(initialize=omega, mutable=True)
 
     # objective components
     cost_investment_generationAndConversion = \
@@ -143,9 +279,9 @@ def perform_optimization(
     cost_operation = \
         R / denominator_R \
         * (sum((existing_capacity.loc[n, i] + (1 + reserve_margin) * model.K[i, n]) * a[i] for i in (G + SC) for n in N)) \
-        + sum(b[i] * model.P[i, n, t] for i in G for n in N for t in T)
+        + sum(b[i] * w[t] * model.P[i, n, t] for i in G for n in N for t in T)
 
-    cost_lol = sum(model.lol[n, t] * lol for n in N for t in T)
+    cost_lol = sum(model.lol[n, t] * lol * w[t] for n in N for t in T)
 
     # declaring objective function
     model.obj = Objective(
@@ -156,23 +292,44 @@ def perform_optimization(
         cost_lol
     )
 
+    # line flow and net injection: variables, or their defining expressions if they are eliminated
+    def flow_expression(mod, ell, t):
+        if flow_formulation == 'ptdf':
+            return sum(PTDF[ell, n] * mod.Z_net[n, t] for n in N if PTDF[ell, n] != 0)
+        return (mod.theta[line_from[ell], t] - mod.theta[line_to[ell], t]) / line_x[ell]
+
+    def flow(mod, ell, t):
+        return flow_expression(mod, ell, t) if eliminate else mod.F[ell, t]
+
+    def net_expression(mod, n, t):
+        return sum(flow(mod, ell, t) for ell in lines_out[n]) - sum(flow(mod, ell, t) for ell in lines_in[n])
+
+    def net(mod, n, t):
+        return net_expression(mod, n, t) if eliminate and flow_formulation == 'angle' else mod.Z_net[n, t]
+
     # constructing constraints
     def node_power_balance_rule(mod, n, t):
         return sum(mod.P[i, n, t] for i in G) + mod.lol[n, t] + \
                sum(mod.DP[i, n, t] - mod.CP[i, n, t] for i in SC) - \
-               arr_demand[n, t] == mod.Z_net[n, t]
+               arr_demand[n, t] == net(mod, n, t)
 
     def arbitrage_balance_rule(mod, t):
         return sum(mod.Z_net[n, t] for n in N) == 0
 
     def power_flow_rule(mod, ell, t):
-        return mod.F[ell, t] == sum(PTDF[ell, n] * mod.Z_net[n, t] for n in N)
+        return mod.F[ell, t] == flow_expression(mod, ell, t)
+
+    def line_flow_rule(mod, ell, t):
+        return mod.F[ell, t] == flow_expression(mod, ell, t)
+
+    def node_flow_balance_rule(mod, n, t):
+        return mod.Z_net[n, t] == net_expression(mod, n, t)
 
     def transmission_upper_limit_rule(mod, ell, t):
-        return mod.F[ell, t] <= mod.K_T[ell] / 2 + existing_line[ell]
+        return flow(mod, ell, t) <= mod.K_T[ell] / 2 + existing_line[ell]
 
     def transmission_lower_limit_rule(mod, ell, t):
-        return mod.F[ell, t] >= - (mod.K_T[ell] / 2 + existing_line[ell])
+        return flow(mod, ell, t) >= - (mod.K_T[ell] / 2 + existing_line[ell])
 
     def max_output_rule1(mod, n, t):
         return mod.P['onshore', n, t] <= arr_onshore[n, t] * (mod.K['onshore', n] + existing_capacity.loc[n, 'onshore'])
@@ -201,8 +358,8 @@ def perform_optimization(
         return mod.DP[i, n, t] <= mod.K[i, n]
 
     def RES_share(mod):
-        return omega * sum(mod.P[i, n, t] for i in RES for n in N for t in T) \
-               >= sum(mod.P[i, n, t] for i in G for n in N for t in T)
+        return mod.omega * sum(w[t] * mod.P[i, n, t] for i in RES for n in N for t in T) \
+               >= sum(w[t] * mod.P[i, n, t] for i in G for n in N for t in T)
 
     def max_wind_capacity(mod, n):
         return mod.K['onshore', n] * (1 + reserve_margin) \
@@ -214,22 +371,94 @@ def perform_optimization(
 
     # declaring constraints
     model.node_power_balance = Constraint(N, T, rule=node_power_balance_rule)
-    model.arbitrage_balance = Constraint(T, rule=arbitrage_balance_rule)
-    model.power_flow = Constraint(FL, T, rule=power_flow_rule)
+    if flow_formulation == 'ptdf':
+        model.arbitrage_balance = Constraint(T, rule=arbitrage_balance_rule)
+        if not eliminate:
+            model.power_flow = Constraint(FL, T, rule=power_flow_rule)
+    elif flow_formulation == 'angle':
+        # the flow balance of all nodes adds up to the arbitrage balance
+        if not eliminate:
+            model.line_flow = Constraint(FL, T, rule=line_flow_rule)
+            model.node_flow_balance = Constraint(N, T, rule=node_flow_balance_rule)
+    else:
+        raise ValueError(f'Unknown flow formulation: "{flow_formulation}"')
     model.transmission_upper_limit = Constraint(FL, T, rule=transmission_upper_limit_rule)
     model.transmission_lower_limit = Constraint(FL, T, rule=transmission_lower_limit_rule)
     model.max_output_rule1 = Constraint(N, T, rule=max_output_rule1)
     model.max_output_rule2 = Constraint(N, T, rule=max_output_rule2)
     model.max_output_rule3 = Constraint(non_VRES, N, T, rule=max_output_rule3)
-    model.storage_rule_start = Constraint(S, N, rule=storage_rule_start)
-    model.storage_rule = Constraint(S, N, T2, rule=storage_rule)
-    model.storage_limit_rule = Constraint(S, N, T, rule=storage_limit)
+    if periods is None:
+        model.storage_rule_start = Constraint(S, N, rule=storage_rule_start)
+        model.storage_rule = Constraint(S, N, T2, rule=storage_rule)
+        model.storage_limit_rule = Constraint(S, N, T, rule=storage_limit)
+    else:
+        __add_storage_inter_period(model, periods, S, N, T, eta_in, eta_out)
     model.charging_limit_rule = Constraint(SC, N, T, rule=charging_limit)
     model.discharging_limit_rule = Constraint(SC, N, T, rule=discharging_limit)
     model.RES_share_rule = Constraint(rule=RES_share)
     model.max_wind_capacity_rule = Constraint(N, rule=max_wind_capacity)
     model.max_solar_capacity_rule = Constraint(N, rule=max_solar_capacity)
-    print('Model building finished!')
+
+    return model
+
+
+def __add_storage_inter_period(model: ConcreteModel, periods: RepresentativePeriods, S, N, T, eta_in, eta_out):
+    """
+    Storage constraints for representative periods, linked across the original (chronological) periods.
+
+    Within a representative period, SP is the state of charge relative to the start of the period, so it starts from 0.
+    SP_inter is the actual state of charge at the start of each original period: it evolves by the net change of SP over
+    the representative period standing for that original period, and wraps around at the end of the horizon.
+    The storage limits apply to SP_inter plus the highest (SP_max) and lowest (SP_min) relative state within the period.
+    """
+    Lp = periods.period_length
+    K = range(periods.num_periods)
+    D = range(len(periods.sequence))
+    starts = T[::Lp]
+    intra = [t for t in T if t % Lp != 0]
+
+    model.SP_max = Var(S, N, K, domain=NonNegativeReals)
+    model.SP_min = Var(S, N, K, domain=NonPositiveReals)
+    model.SP_inter = Var(S, N, D, domain=NonNegativeReals)
+
+    def storage_rule_start(mod, i, n, t):
+        return mod.SP[i, n, t] == eta_in[i] * mod.CP[i, n, t] - 1 / eta_out[i] * mod.DP[i, n, t]
+
+    def storage_rule(mod, i, n, t):
+        return mod.SP[i, n, t] == mod.SP[i, n, (t - 1)] \
+               + eta_in[i] * mod.CP[i, n, t] - 1 / eta_out[i] * mod.DP[i, n, t]
+
+    def storage_intra_max(mod, i, n, t):
+        return mod.SP[i, n, t] <= mod.SP_max[i, n, t // Lp]
+
+    def storage_intra_min(mod, i, n, t):
+        return mod.SP[i, n, t] >= mod.SP_min[i, n, t // Lp]
+
+    def storage_inter_rule(mod, i, n, d):
+        k = periods.sequence[d]
+        return mod.SP_inter[i, n, (d + 1) % len(D)] == mod.SP_inter[i, n, d] + mod.SP[i, n, (k + 1) * Lp - 1]
+
+    def storage_inter_upper_limit(mod, i, n, d):
+        return mod.SP_inter[i, n, d] + mod.SP_max[i, n, periods.sequence[d]] <= mod.K_S[i, n]
+
+    def storage_inter_lower_limit(mod, i, n, d):
+        return mod.SP_inter[i, n, d] + mod.SP_min[i, n, periods.sequence[d]] >= 0
+
+    model.storage_rule_start = Constraint(S, N, starts, rule=storage_rule_start)
+    model.storage_rule = Constraint(S, N, intra, rule=storage_rule)
+    model.storage_intra_max_rule = Constraint(S, N, T, rule=storage_intra_max)
+    model.storage_intra_min_rule = Constraint(S, N, T, rule=storage_intra_min)
+    model.storage_inter_rule = Constraint(S, N, D, rule=storage_inter_rule)
+    model.storage_inter_upper_limit_rule = Constraint(S, N, D, rule=storage_inter_upper_limit)
+    model.storage_inter_lower_limit_rule = Constraint(S, N, D, rule=storage_inter_lower_limit)
+
+
+def make_pyomo_solver(solver_params: SolverParams):
+    if solver_params.name == 'highs':
+        # in-process HiGHS (highspy) through Pyomo's APPSI interface, with the knobs translated to HiGHS options
+        opt = SolverFactory('appsi_highs')
+        opt.options.update(highs_options(solver_params))
+        return opt
 
     opt = SolverFactory(solver_params.name)
 
@@ -242,19 +471,7 @@ def perform_optimization(
     if solver_params.threads:
         opt.options["Threads"] = solver_params.threads
 
-    opt.solve(model)
-    print('Model solved!')
-
-    # Post-processing
-    # save data in dataframes
-    def evaluation(indexedvar):
-        return pd.Series(indexedvar.get_values())
-
-    # Output:
-    # noinspection PyTypeChecker
-    evaluation(model.K).unstack().to_csv(paths.optimized_gencap_renew)
-    # noinspection PyTypeChecker
-    evaluation(model.K_T).to_csv(paths.optimized_transcap_renew)
+    return opt
 
 
 def default_perform_optimization():
@@ -264,6 +481,8 @@ def default_perform_optimization():
         solver_params=config_optimization_default.solver_params,
         num_rows_cost_params=config_optimization_default.num_rows_cost_params,
         other_params=config_optimization_default.other_params,
+        formulation_params=config_optimization_default.formulation_params,
+        aggregation_params=config_optimization_default.aggregation_params,
     )
 
 
@@ -0,0 +1,193 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Reading of all the inputs of the optimization step, shared by every model builder.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from grim_opt.config import OptimizationPaths, EnergyTechParams, OptOtherParams
+from grim_opt.input_cache import read_excel_cached, read_csv_cached, read_time_series_cached
+from grim_opt.ptdf import cached_ptdf
+
+
+@dataclass
+class RepresentativePeriods:
+    period_length: int
+    """
+    Number of time steps per period
+    """
+    weights: np.ndarray
+    """
+    shape = (num_periods,): number of original periods represented by each representative period, scaled so that the
+    weighted number of time steps equals R
+    """
+    sequence: np.ndarray
+    """
+    shape = (number of original periods,): representative period of each original period, in chronological order
+    """
+
+    @property
+    def num_periods(self) -> int:
+        return len(self.weights)
+
+    def hour_weights(self) -> np.ndarray:
+        """
+        Weight of each time step of the aggregated horizon, shape = (num_periods * period_length,)
+        """
+        return np.repeat(self.weights, self.period_length)
+
+
+@dataclass
+class OptimizationInputs:
+    C: Dict[str, float]
+    """
+    Investment cost of generation and conversion (€/MW)
+    """
+    C_S: Dict[str, float]
+    """
+    Investment cost of storage (€/MWh)
+    """
+    a: Dict[str, float]
+    """
+    Fixed operation and maintenance cost (€/MW/yr)
+    """
+    b: Dict[str, float]
+    """
+    Variable operation and maintenance cost (€/MWh)
+    """
+    L: Dict[str, float]
+    """
+    Lifetime (yr)
+    """
+    eta_in: Dict[str, float]
+    eta_out: Dict[str, float]
+
+    KM_onshore: Dict[int, float]
+    KM_solar: Dict[int, float]
+    capacity_density_onshore: float
+    capacity_density_solar: float
+
+    existing_capacity: pd.DataFrame
+    """
+    Existing generation capacity (MW), per node (rows) and per technology (columns)
+    """
+    PTDF: np.ndarray
+    """
+    Power transfer distribution factors, shape = (lines, nodes). Node 0 is the slack node.
+    """
+    existing_line: pd.Series
+    distance: pd.Series
+    line_from: np.ndarray
+    line_to: np.ndarray
+    line_x: np.ndarray
+    """
+    End nodes ('region1', 'region2') and reactance of every line
+    """
+
+    arr_demand: np.ndarray
+    arr_onshore: np.ndarray
+    arr_solar: np.ndarray
+
+    periods: Optional[RepresentativePeriods] = None
+    """
+    None: the time series are chronological. Otherwise, they are made of consecutive representative periods.
+    """
+
+    def hour_weights(self, T: np.ndarray) -> np.ndarray:
+        """
+        Weight of each time step of the horizon T in the objective and in the RES share
+        """
+        return np.ones(len(T)) if self.periods is None else self.periods.hour_weights()
+
+
+def read_optimization_inputs(
+        paths: OptimizationPaths,
+        et_params: EnergyTechParams,
+        num_rows_cost_params: int,
+        other_params: OptOtherParams,
+        ) -> OptimizationInputs:
+    """
+    Read (and pre-compute) all the data needed to build the optimization model, independently of the model builder used.
+
+    :param paths Struct with all the filepaths (input and output) needed for the optimization step
+    :type paths OptimizationPaths
+    :param et_params:
+    :param num_rows_cost_params: Number of rows in the cost parameters spreadsheet
+    :param other_params:
+
+    :return: All the optimization inputs, as plain Python/NumPy/pandas objects
+    """
+    N = et_params.N
+    G = et_params.G
+    SC = et_params.SC
+    S = SC
+
+    # cost parameters
+    df_parameters = read_excel_cached(paths.params_techno_econ, index_col=0)
+    C = {i: num_rows_cost_params * df_parameters.loc[i, 'CapEx(€/kW)'] for i in (G + SC)}
+    C_S = {i: num_rows_cost_params * df_parameters.loc[i, 'CapExStorage(€/kWh)'] for i in S}  # €/MW
+    a = {i: num_rows_cost_params * df_parameters.loc[i, 'FOM(€/kW/yr)'] for i in (G + SC)}  # €/MW/yr
+    b = {i: num_rows_cost_params * df_parameters.loc[i, 'VOM(€/kWh)'] for i in G}  # €/MWh
+    L = {i: df_parameters.loc[i, 'Lifetime(yr)'] for i in (G + SC + S)}
+    # e = {i: df_parameters.loc[i, 'Pollution(tCO2/MWh)'] for i in G}  # TODO: is this used? when?
+    # eta = {i: df_parameters.loc[i, 'eta'] for i in G}  # TODO: is this used? when?
+    eta_in = {i: df_parameters.loc[i, 'eta_in'] for i in SC}
+    eta_out = {i: df_parameters.loc[i, 'eta_out'] for i in SC}
+
+    # land-use data
+    df_KM = read_csv_cached(paths.region_area_generation, index_col=0)
+    KM_onshore = {n: df_KM.loc[n, 'wind'] for n in N}
+    KM_solar = {n: df_KM.loc[n, 'solar'] for n in N}
+    capacity_density_onshore = 5  # MW/km2
+    capacity_density_solar = 30  # MW/km2
+
+    # existing generation capacity
+    df_generation = read_excel_cached(paths.gencap_existing)
+    existing_capacity = df_generation.fillna(0)
+
+    # create PTDF (node 0 is slack node)
+    df = read_csv_cached(paths.transcap_connections)
+    PTDF = cached_ptdf(df, len(N))
+
+    existing_line = df['capacity']
+    distance = df['length']
+
+    # time-series data
+    # only the modelled window of R time steps, starting at start_hour: arr[n, t] is time step start_hour + t
+    window = (other_params.start_hour, other_params.R)
+    arr_demand = __read_time_series_window(paths.electricity_demand, N, *window)  # MWh
+    arr_onshore = __read_time_series_window(paths.electricity_gencap_factors_new_wind, N, *window)
+    arr_solar = __read_time_series_window(paths.electricity_gencap_factors_new_solar, N, *window)
+
+    return OptimizationInputs(
+        C=C, C_S=C_S, a=a, b=b, L=L, eta_in=eta_in, eta_out=eta_out,
+        KM_onshore=KM_onshore, KM_solar=KM_solar,
+        capacity_density_onshore=capacity_density_onshore, capacity_density_solar=capacity_density_solar,
+        existing_capacity=existing_capacity,
+        PTDF=PTDF, existing_line=existing_line, distance=distance,
+        line_from=df['region1'].to_numpy(), line_to=df['region2'].to_numpy(), line_x=df['x'].to_numpy(dtype=float),
+        arr_demand=arr_demand, arr_onshore=arr_onshore, arr_solar=arr_solar,
+    )
+
+
+def __read_time_series_window(path: Path, N: np.ndarray, start: int, length: int) -> np.ndarray:
+    """
+    :return: shape = (nodes, length): the time steps start ... start + length - 1 of the column of every node
+    """
+    columns, values = read_time_series_cached(path)
+    if start < 0 or start + length > len(values):
+        raise ValueError(f'{path} has {len(values)} time steps, cannot read {length} time steps from {start}')
+
+    arr = np.zeros([len(N), length])
+    arr[N, :] = values[start:start + length, [columns.get_loc(str(n)) for n in N]].T
+    return arr
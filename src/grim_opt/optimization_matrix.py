@@ -0,0 +1,456 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Matrix-based model builder: the same LP as the Pyomo model in `optimization.py`, assembled as sparse coefficient blocks
+straight from the NumPy input arrays, without creating any per-element Python expression objects.
+
+Rows are stored HiGHS-style, i.e. as `row_lower <= A x <= row_upper`, with one block of rows per Pyomo constraint.
+"""
+import warnings
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import linprog
+
+from grim_opt.config import EnergyTechParams, OptOtherParams, SolverParams, OptFormulationParams
+from grim_opt.optimization_inputs import OptimizationInputs, RepresentativePeriods
+
+
+@dataclass
+class LinearProgram:
+    c: np.ndarray
+    c0: float
+    """
+    Constant term of the objective
+    """
+    A: sp.csr_matrix
+    row_lower: np.ndarray
+    row_upper: np.ndarray
+    col_lower: np.ndarray
+    col_upper: np.ndarray
+    col_blocks: Dict[str, np.ndarray]
+    """
+    For each variable name (as in the Pyomo model), the array of column indices, shaped like the variable's index sets
+    """
+    col_labels: Dict[str, List[list]]
+    """
+    For each variable name, the index sets (labels) along each dimension of its block
+    """
+    row_blocks: Dict[str, np.ndarray]
+    """
+    For each constraint name (as in the Pyomo model), the array of row indices
+    """
+    hour_weights: np.ndarray
+    """
+    Weight of each time step in the objective and in the RES share
+    """
+
+    def block_values(self, name: str, solution: np.ndarray) -> pd.Series:
+        """
+        Values of one variable block, as a Series indexed like `pd.Series(pyomo_var.get_values())` would be
+        """
+        labels = self.col_labels[name]
+        values = solution[self.col_blocks[name]].ravel()
+        if len(labels) == 1:
+            return pd.Series(values, index=labels[0])
+        return pd.Series(values, index=pd.MultiIndex.from_product(labels))
+
+
+class _Columns:
+    def __init__(self):
+        self.size = 0
+        self.lower: List[np.ndarray] = []
+        self.upper: List[np.ndarray] = []
+        self.blocks: Dict[str, np.ndarray] = {}
+        self.labels: Dict[str, List[list]] = {}
+
+    def add(self, name: str, labels: List[list], lower=0.0, upper=np.inf) -> np.ndarray:
+        shape = tuple(len(lbl) for lbl in labels)
+        count = int(np.prod(shape))
+        idx = np.arange(self.size, self.size + count).reshape(shape)
+        self.size += count
+        self.lower.append(np.broadcast_to(np.asarray(lower, dtype=float), shape).ravel())
+        self.upper.append(np.broadcast_to(np.asarray(upper, dtype=float), shape).ravel())
+        self.blocks[name] = idx
+        self.labels[name] = [list(lbl) for lbl in labels]
+        return idx
+
+
+class _Rows:
+    def __init__(self):
+        self.size = 0
+        self.lower: List[np.ndarray] = []
+        self.upper: List[np.ndarray] = []
+        self.rows: List[np.ndarray] = []
+        self.cols: List[np.ndarray] = []
+        self.vals: List[np.ndarray] = []
+        self.blocks: Dict[str, np.ndarray] = {}
+
+    def add(self, name: str, shape: Tuple[int, ...], lower, upper) -> np.ndarray:
+        count = int(np.prod(shape))
+        idx = np.arange(self.size, self.size + count).reshape(shape)
+        self.size += count
+        self.lower.append(np.broadcast_to(np.asarray(lower, dtype=float), shape).ravel())
+        self.upper.append(np.broadcast_to(np.asarray(upper, dtype=float), shape).ravel())
+        self.blocks[name] = idx
+        return idx
+
+    def coef(self, rows: np.ndarray, cols: np.ndarray, vals=1.0):
+        rows, cols, vals = np.broadcast_arrays(rows, cols, np.asarray(vals, dtype=float))
+        self.rows.append(rows.ravel())
+        self.cols.append(cols.ravel())
+        self.vals.append(vals.ravel())
+
+    def matrix(self, num_cols: int) -> sp.csr_matrix:
+        A = sp.coo_matrix(
+            (np.concatenate(self.vals), (np.concatenate(self.rows), np.concatenate(self.cols))),
+            shape=(self.size, num_cols),
+        ).tocsr()  # duplicate entries are summed here
+        A.eliminate_zeros()
+        return A
+
+
+def build_linear_program(
+        inputs: OptimizationInputs,
+        et_params: EnergyTechParams,
+        other_params: OptOtherParams,
+        formulation_params: OptFormulationParams,
+        ) -> LinearProgram:
+    """
+    Build the investment model as a sparse LP. Variables, constraints and objective are identical to the ones of
+    `optimization.build_pyomo_model`, but every constraint family is generated at once from the input arrays.
+    """
+    N = et_params.N
+    FL = et_params.FL
+    G = et_params.G
+    SC = et_params.SC
+    RES = et_params.RES
+    non_VRES = et_params.non_VRES
+    S = SC
+
+    R = other_params.R
+    denominator_R = other_params.denominator_R
+    T = other_params.T
+    T2 = other_params.T2
+    r = other_params.r
+    reserve_margin = other_params.reserve_margin
+    omega = other_params.omega
+
+    GSC = G + SC
+    existing = inputs.existing_capacity
+    ex = {i: existing.loc[N, i].to_numpy(dtype=float) for i in GSC}  # per node
+    demand = inputs.arr_demand[np.ix_(N, T)]
+    cf_onshore = inputs.arr_onshore[np.ix_(N, T)]
+    cf_solar = inputs.arr_solar[np.ix_(N, T)]
+    periods = inputs.periods
+    w = inputs.hour_weights(T)
+    existing_line = inputs.existing_line.loc[FL].to_numpy(dtype=float)
+    distance = inputs.distance.loc[FL].to_numpy(dtype=float)
+
+    def annuity(lifetime):
+        return (1 - 1 / (1 + r) ** lifetime) / r
+
+    # declare variables
+    cols = _Columns()
+    K = cols.add('K', [GSC, N])
+    K_S = cols.add('K_S', [S, N])
+    P = cols.add('P', [G, N, T])
+    lol = cols.add('lol', [N, T])
+    DP = cols.add('DP', [SC, N, T])
+    CP = cols.add('CP', [SC, N, T])
+    SP = cols.add('SP', [S, N, T], lower=0.0 if periods is None else -np.inf)
+    K_T = cols.add('K_T', [FL])
+    flow_formulation = formulation_params.flow_formulation
+    eliminate = formulation_params.eliminate_auxiliary
+    # F (and, with the angle formulation, Z_net) can be substituted by their defining expressions
+    F = None if eliminate else cols.add('F', [FL, T], lower=-np.inf)
+    Z_net = None if eliminate and flow_formulation == 'angle' else cols.add('Z_net', [N, T], lower=-np.inf)
+    if flow_formulation == 'angle':
+        # voltage angles, fixed to 0 at the slack node (node 0)
+        free = np.where(np.arange(len(N)) == 0, 0.0, np.inf)[:, None]
+        theta = cols.add('theta', [N, T], lower=-free, upper=free)
+
+    g = {i: k for k, i in enumerate(GSC)}
+    s = {i: k for k, i in enumerate(S)}
+
+    # objective
+    scale = R / denominator_R
+    c = np.zeros(cols.size)
+    c0 = 0.0
+    for i in GSC:
+        c[K[g[i]]] = scale * (inputs.C[i] * (1 + reserve_margin) / annuity(inputs.L[i]) + (1 + reserve_margin) * inputs.a[i])
+        c0 += scale * inputs.a[i] * ex[i].sum()
+    for i in S:
+        c[K_S[s[i]]] = scale * inputs.C_S[i] * (1 + reserve_margin) / annuity(inputs.L[i])
+    c[K_T] = scale * distance * other_params.e_l * other_params.CT / annuity(other_params.LT)
+    for k, i in enumerate(G):
+        c[P[k]] = inputs.b[i] * w
+    c[lol] = other_params.lol * w
+
+    # constraints
+    rows = _Rows()
+    nN, nT, nFL = len(N), len(T), len(FL)
+
+    if flow_formulation == 'ptdf':
+        ptdf = inputs.PTDF[np.ix_(FL, N)]
+        ell_nz, n_nz = np.nonzero(ptdf)
+    elif flow_formulation == 'angle':
+        node = {n: k for k, n in enumerate(N)}
+        frm = np.array([node[n] for n in inputs.line_from[FL]], dtype=int)
+        to = np.array([node[n] for n in inputs.line_to[FL]], dtype=int)
+        x = inputs.line_x[FL]
+    else:
+        raise ValueError(f'Unknown flow formulation: "{flow_formulation}"')
+
+    def flow_expression(row, sign=1.0):
+        """
+        Coefficients of sign * F in the rows `row` (shape = (FL, T)), or of its defining expression if F is eliminated
+        """
+        if F is not None:
+            rows.coef(row, F, sign)
+        elif flow_formulation == 'ptdf':  # PTDF Z_net
+            rows.coef(row[ell_nz], Z_net[n_nz], sign * ptdf[ell_nz, n_nz][:, None])
+        else:  # (theta_from - theta_to) / x
+            rows.coef(row, theta[frm], sign / x[:, None])
+            rows.coef(row, theta[to], -sign / x[:, None])
+
+    # node_power_balance: sum P + lol + sum (DP - CP) - Z_net == demand
+    row = rows.add('node_power_balance', (nN, nT), demand, demand)
+    for k in range(len(G)):
+        rows.coef(row, P[k])
+    rows.coef(row, lol)
+    for k in range(len(SC)):
+        rows.coef(row, DP[k])
+        rows.coef(row, CP[k], -1.0)
+    if Z_net is not None:
+        rows.coef(row, Z_net, -1.0)
+    else:  # Z_net = (flows leaving) - (flows entering)
+        flow_expression(row[frm], -1.0)
+        flow_expression(row[to], 1.0)
+
+    if flow_formulation == 'ptdf':
+        # arbitrage_balance: sum_n Z_net == 0
+        row = rows.add('arbitrage_balance', (nT,), 0.0, 0.0)
+        rows.coef(row[None, :], Z_net)
+
+        if F is not None:
+            # power_flow: F - PTDF Z_net == 0
+            row = rows.add('power_flow', (nFL, nT), 0.0, 0.0)
+            rows.coef(row, F)
+            rows.coef(row[ell_nz], Z_net[n_nz], -ptdf[ell_nz, n_nz][:, None])
+
+    else:
+        if F is not None:
+            # line_flow: F - (theta_from - theta_to) / x == 0
+            row = rows.add('line_flow', (nFL, nT), 0.0, 0.0)
+            rows.coef(row, F)
+            rows.coef(row, theta[frm], -1 / x[:, None])
+            rows.coef(row, theta[to], 1 / x[:, None])
+
+        if Z_net is not None:
+            # node_flow_balance: Z_net - (flows leaving) + (flows entering) == 0
+            row = rows.add('node_flow_balance', (nN, nT), 0.0, 0.0)
+            rows.coef(row, Z_net)
+            flow_expression(row[frm], -1.0)
+            flow_expression(row[to], 1.0)
+
+    # transmission limits: -(K_T / 2 + existing_line) <= F <= K_T / 2 + existing_line
+    row = rows.add('transmission_upper_limit', (nFL, nT), -np.inf, existing_line[:, None])
+    flow_expression(row)
+    rows.coef(row, K_T[:, None], -0.5)
+    row = rows.add('transmission_lower_limit', (nFL, nT), -existing_line[:, None], np.inf)
+    flow_expression(row)
+    rows.coef(row, K_T[:, None], 0.5)
+
+    # max_output_rule1/2: P <= cf * (K + existing)
+    for name, tech, cf in (('max_output_rule1', 'onshore', cf_onshore), ('max_output_rule2', 'solar', cf_solar)):
+        row = rows.add(name, (nN, nT), -np.inf, cf * ex[tech][:, None])
+        rows.coef(row, P[G.index(tech)])
+        rows.coef(row, K[g[tech]][:, None], -cf)
+
+    # max_output_rule3: P <= K + existing
+    row = rows.add('max_output_rule3', (len(non_VRES), nN, nT), -np.inf, np.array([ex[i] for i in non_VRES])[:, :, None])
+    for k, i in enumerate(non_VRES):
+        rows.coef(row[k], P[G.index(i)])
+        rows.coef(row[k], K[g[i]][:, None], -1.0)
+
+    eta_in = np.array([inputs.eta_in[i] for i in S])[:, None, None]
+    eta_out = np.array([inputs.eta_out[i] for i in S])[:, None, None]
+    if periods is None:
+        # storage_rule_start and storage_rule: SP[t] == SP[t-1] + eta_in CP[t] - DP[t] / eta_out, wrapping around at t = 0
+        row = rows.add('storage_rule_start', (len(S), nN), 0.0, 0.0)
+        rows.coef(row, SP[:, :, 0])
+        rows.coef(row, SP[:, :, -1], -1.0)
+        rows.coef(row, CP[:, :, 0], -eta_in[:, :, 0])
+        rows.coef(row, DP[:, :, 0], 1 / eta_out[:, :, 0])
+        row = rows.add('storage_rule', (len(S), nN, len(T2)), 0.0, 0.0)
+        rows.coef(row, SP[:, :, 1:])
+        rows.coef(row, SP[:, :, :-1], -1.0)
+        rows.coef(row, CP[:, :, 1:], -eta_in)
+        rows.coef(row, DP[:, :, 1:], 1 / eta_out)
+
+        row = rows.add('storage_limit_rule', (len(S), nN, nT), -np.inf, 0.0)
+        rows.coef(row, SP)
+        rows.coef(row, K_S[:, :, None], -1.0)
+    else:
+        _add_storage_inter_period(cols, rows, periods, SP, CP, DP, K_S, eta_in, eta_out)
+
+    # charging and discharging limits
+    row = rows.add('charging_limit_rule', (len(SC), nN, nT), -np.inf, 0.0)
+    rows.coef(row, CP)
+    rows.coef(row, K[[g[i] for i in SC]][:, :, None], -1.0)
+    row = rows.add('discharging_limit_rule', (len(SC), nN, nT), -np.inf, 0.0)
+    rows.coef(row, DP)
+    rows.coef(row, K[[g[i] for i in SC]][:, :, None], -1.0)
+
+    # RES_share_rule: omega * sum_RES P - sum_G P >= 0
+    row = rows.add('RES_share_rule', (1,), 0.0, np.inf)
+    rows.coef(row, P, res_share_coefs(G, RES, omega)[:, None, None] * w)
+
+    # max_wind_capacity and max_solar_capacity
+    for name, tech, KM, density in (
+            ('max_wind_capacity_rule', 'onshore', inputs.KM_onshore, inputs.capacity_density_onshore),
+            ('max_solar_capacity_rule', 'solar', inputs.KM_solar, inputs.capacity_density_solar)):
+        row = rows.add(name, (nN,), -np.inf, np.array([KM[n] for n in N]) * density - ex[tech])
+        rows.coef(row, K[g[tech]], 1 + reserve_margin)
+
+    # columns added along with their constraints (e.g. inter-period storage) have no cost
+    c = np.concatenate([c, np.zeros(cols.size - len(c))])
+
+    return LinearProgram(
+        c=c, c0=c0, A=rows.matrix(cols.size),
+        row_lower=np.concatenate(rows.lower), row_upper=np.concatenate(rows.upper),
+        col_lower=np.concatenate(cols.lower), col_upper=np.concatenate(cols.upper),
+        col_blocks=cols.blocks, col_labels=cols.labels, row_blocks=rows.blocks, hour_weights=w,
+    )
+
+
+def _add_storage_inter_period(cols: _Columns, rows: _Rows, periods: RepresentativePeriods, SP, CP, DP, K_S, eta_in, eta_out):
+    """
+    Storage rows for representative periods, linked across the original periods (see the Pyomo model for the meaning
+    of SP, SP_max, SP_min and SP_inter)
+    """
+    S, N, _ = cols.labels['SP']
+    Lp = periods.period_length
+    num_periods, num_original = periods.num_periods, len(periods.sequence)
+    nS, nN = len(S), len(N)
+
+    SP_max = cols.add('SP_max', [S, N, range(num_periods)])
+    SP_min = cols.add('SP_min', [S, N, range(num_periods)], lower=-np.inf, upper=0.0)
+    SP_inter = cols.add('SP_inter', [S, N, range(num_original)])
+
+    # per period view: (S, N, period, time step within the period)
+    SP_p = SP.reshape(nS, nN, num_periods, Lp)
+    CP_p = CP.reshape(nS, nN, num_periods, Lp)
+    DP_p = DP.reshape(nS, nN, num_periods, Lp)
+
+    row = rows.add('storage_rule_start', (nS, nN, num_periods), 0.0, 0.0)
+    rows.coef(row, SP_p[..., 0])
+    rows.coef(row, CP_p[..., 0], -eta_in)
+    rows.coef(row, DP_p[..., 0], 1 / eta_out)
+    row = rows.add('storage_rule', (nS, nN, num_periods, Lp - 1), 0.0, 0.0)
+    rows.coef(row, SP_p[..., 1:])
+    rows.coef(row, SP_p[..., :-1], -1.0)
+    rows.coef(row, CP_p[..., 1:], -eta_in[..., None])
+    rows.coef(row, DP_p[..., 1:], 1 / eta_out[..., None])
+
+    row = rows.add('storage_intra_max_rule', (nS, nN, num_periods, Lp), -np.inf, 0.0)
+    rows.coef(row, SP_p)
+    rows.coef(row, SP_max[..., None], -1.0)
+    row = rows.add('storage_intra_min_rule', (nS, nN, num_periods, Lp), 0.0, np.inf)
+    rows.coef(row, SP_p)
+    rows.coef(row, SP_min[..., None], -1.0)
+
+    seq = periods.sequence
+    row = rows.add('storage_inter_rule', (nS, nN, num_original), 0.0, 0.0)
+    rows.coef(row, SP_inter[:, :, np.roll(np.arange(num_original), -1)])
+    rows.coef(row, SP_inter, -1.0)
+    rows.coef(row, SP_p[:, :, seq, -1], -1.0)
+    row = rows.add('storage_inter_upper_limit_rule', (nS, nN, num_original), -np.inf, 0.0)
+    rows.coef(row, SP_inter)
+    rows.coef(row, SP_max[:, :, seq])
+    rows.coef(row, K_S[:, :, None], -1.0)
+    row = rows.add('storage_inter_lower_limit_rule', (nS, nN, num_original), 0.0, np.inf)
+    rows.coef(row, SP_inter)
+    rows.coef(row, SP_min[:, :, seq])
+
+
+def res_share_coefs(G: List[str], RES: List[str], omega: float) -> np.ndarray:
+    """
+    Coefficient of each generation technology's output in the (single) row of `RES_share_rule`
+    """
+    return np.array([(omega if i in RES else 0.0) - 1.0 for i in G])
+
+
+def set_res_share(lp: LinearProgram, et_params: EnergyTechParams, omega: float):
+    """
+    Change the renewable energy target of an already built LP, in place. Only the coefficients of the single row of
+    `RES_share_rule` are replaced, the rest of the matrix is reused as is.
+    """
+    P = lp.col_blocks['P']
+    coefs = np.broadcast_to(res_share_coefs(et_params.G, et_params.RES, omega)[:, None, None] * lp.hour_weights, P.shape).ravel()
+    lp.A = _replace_row(lp.A, lp.row_blocks['RES_share_rule'][0], P.ravel(), coefs)
+
+
+def _replace_row(A: sp.csr_matrix, row: int, cols: np.ndarray, vals: np.ndarray) -> sp.csr_matrix:
+    nz = vals != 0
+    order = np.argsort(cols[nz])
+    cols, vals = cols[nz][order], vals[nz][order]
+
+    start, end = A.indptr[row], A.indptr[row + 1]
+    indptr = A.indptr.copy()
+    indptr[row + 1:] += len(cols) - (end - start)
+    return sp.csr_matrix(
+        (np.concatenate([A.data[:start], vals, A.data[end:]]),
+         np.concatenate([A.indices[:start], cols, A.indices[end:]]),
+         indptr),
+        shape=A.shape,
+    )
+
+
+def solve_linear_program(lp: LinearProgram, solver_params: SolverParams) -> np.ndarray:
+    """
+    Solve the LP with the HiGHS solver shipped with SciPy, whose interface only exposes the choice of the method:
+    1 selects the dual simplex, 2 the interior point method, None lets HiGHS choose. The other settings of
+    `solver_params` cannot be passed on, and a warning is given for each one that is set: the primal simplex (method 0,
+    solved with the dual simplex instead), disabling the crossover (always run after the interior point method), and
+    the number of threads (always 1). The in-process HiGHS solver ('highs', see `highs_solver`) honours all of them.
+
+    :return: The optimal value of every column of the LP
+    """
+    methods = {None: 'highs', 0: 'highs-ds', 1: 'highs-ds', 2: 'highs-ipm'}
+    if solver_params.method not in methods:
+        raise ValueError(f'Unknown solver method: {solver_params.method}')
+    method = methods[solver_params.method]
+
+    if solver_params.method == 0:
+        warnings.warn("SciPy's HiGHS has no primal simplex, the dual simplex is used instead (method 0)")
+    if solver_params.crossover == 0 and solver_params.method in (None, 2):
+        warnings.warn("SciPy's HiGHS always runs the crossover after the interior point method, crossover 0 is ignored")
+    if solver_params.threads is not None and solver_params.threads != 1:
+        warnings.warn(f"SciPy's HiGHS runs on a single thread, threads {solver_params.threads} is ignored")
+
+    is_eq = lp.row_lower == lp.row_upper
+    A_eq = lp.A[is_eq]
+    b_eq = lp.row_upper[is_eq]
+
+    has_upper = ~is_eq & np.isfinite(lp.row_upper)
+    has_lower = ~is_eq & np.isfinite(lp.row_lower)
+    A_ub = sp.vstack([lp.A[has_upper], -lp.A[has_lower]], format='csr')
+    b_ub = np.concatenate([lp.row_upper[has_upper], -lp.row_lower[has_lower]])
+
+    bounds = np.column_stack([lp.col_lower, lp.col_upper])
+
+    res = linprog(lp.c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method=method)
+    if res.status != 0:
+        raise RuntimeError(f'Optimization failed: {res.message}')
+
+    return res.x
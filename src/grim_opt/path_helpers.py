@@ -98,3 +98,9 @@ def mkdefaultpath(experiment: Path, item: FileID) -> Path:
 
 def mkdefaultpath_arg(experiment: Path, item: FileID, arg: str) -> Path:
     return experiment / mkdefaultrelpath(item, arg)
+
+def variant_path(path: Path, name: str) -> Path:
+    """
+    :return: The path of the table of the land cover variant `name`, next to the main table `path`
+    """
+    return path.with_name(f'{path.stem}__{name}{path.suffix}')
@@ -0,0 +1,131 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Make-style runner of processing steps: every step declares the files it reads and writes (as FileIDs and paths), and is
+skipped when its outputs are up to date.
+
+A step is up to date when its fingerprint (the contents of its input files and its parameters) is the one recorded
+after its last run, and its output files still have the contents written then. Since the fingerprint is made of
+contents rather than modification times, a step whose inputs were rewritten with the same contents (e.g. by an
+upstream step run again) is skipped as well.
+
+The records live in the on-disk cache (`cache.py`), one per step and set of output files.
+"""
+import hashlib
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from grim_opt.cache import cache_dir, save_json_atomic
+from grim_opt.path_helpers import FileCategory, FileID
+
+
+@dataclass
+class PipelineStep:
+    name: str
+    inputs: List[Tuple[FileID, Path]]
+    outputs: List[Tuple[FileID, Path]]
+    """
+    Every output must be a FileCategory.FILE_OUTPUT file
+    """
+    params: object
+    """
+    Everything else the outputs depend on (e.g. the config section of the step); compared through its repr
+    """
+    run: Callable[[], None]
+
+
+def run_pipeline(steps: List[PipelineStep], force: bool = False):
+    """
+    Run the steps in the given order (every step after the steps producing its inputs), skipping those whose outputs
+    are up to date
+
+    :param force: If True, run every step, whether up to date or not
+    """
+    for step in steps:
+        for file_id, path in step.outputs:
+            if file_id.category() != FileCategory.FILE_OUTPUT:
+                raise ValueError(f'Step {step.name} cannot write {path}: {file_id.name} is not an output file')
+
+        record_path = cache_dir('pipeline') / f'{__record_key(step)}.json'
+        fingerprint = step_fingerprint(step)
+
+        if not force and fingerprint is not None and __is_up_to_date(record_path, fingerprint):
+            print(f'Step {step.name}: up to date, skipped')
+            continue
+
+        print(f'Step {step.name}: running')
+        step.run()
+
+        if fingerprint is not None:
+            save_json_atomic(record_path, {'fingerprint': fingerprint, 'outputs': __output_hashes(step)})
+
+
+def step_fingerprint(step: PipelineStep) -> Optional[str]:
+    """
+    :return: The hash of the contents of the inputs and of the parameters of the step, None if an input is missing
+    """
+    h = hashlib.sha256(step.name.encode())
+    for file_id, path in step.inputs:
+        if not Path(path).is_file():
+            return None
+        h.update(f'|{file_id.name}|{file_hash(path)}'.encode())
+
+    with np.printoptions(threshold=sys.maxsize):  # the whole arrays, not a summary
+        h.update(repr(step.params).encode())
+    return h.hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    """
+    Hash of the contents of a file. The hash is kept in the cache, keyed by the path, modification time and size of
+    the file, so that large unchanged files are not read again on every run.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    key = hashlib.sha256(f'{path}|{stat.st_mtime_ns}|{stat.st_size}'.encode()).hexdigest()
+    memo = cache_dir('pipeline', 'files') / f'{key}.json'
+    if memo.exists():
+        with open(memo, 'r') as f:
+            return json.load(f)
+
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    save_json_atomic(memo, h.hexdigest())
+    return h.hexdigest()
+
+
+def __record_key(step: PipelineStep) -> str:
+    outputs = sorted(str(Path(path).resolve()) for _, path in step.outputs)
+    return hashlib.sha256(f'{step.name}|{outputs}'.encode()).hexdigest()
+
+
+def __output_hashes(step: PipelineStep) -> Dict[str, Optional[str]]:
+    return {
+        str(Path(path).resolve()): file_hash(path) if Path(path).is_file() else None
+        for _, path in step.outputs
+    }
+
+
+def __is_up_to_date(record_path: Path, fingerprint: str) -> bool:
+    if not record_path.exists():
+        return False
+    with open(record_path, 'r') as f:
+        record = json.load(f)
+
+    # the outputs must not have been deleted or edited since they were written
+    return record['fingerprint'] == fingerprint and all(
+        output_hash is not None and Path(path).is_file() and file_hash(Path(path)) == output_hash
+        for path, output_hash in record['outputs'].items()
+    )
@@ -5,1339 +5,291 @@
 #  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
 #
 #  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Maps of the optimized generation capacity per region: one row of maps per scenario (optimized_gencap file), one column
+per technology.
+
+Every map (panel) is rendered on its own, possibly by a worker process, and the panels are then put together into the
+final figure. The region polygons are merged and projected (with pyproj) only once, for all the panels. Each map is a
+single PolyCollection, drawn over a background of coastlines and country borders (Natural Earth 1:110m countries,
+shipped in `data/`) and the outline of the whole area. The background is rendered only once as an image, and cached.
+
+The rendered panels are kept in the on-disk cache (`cache.py`), keyed by a fingerprint of everything they are rendered
+from: after re-solving a few scenarios, only the panels whose data changed are rendered again, and the figure is put
+together from the cached panels (or copied from the cache, if nothing changed at all).
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+from pathlib import Path
+from typing import List, Optional, Tuple
+
 import numpy as np
 import pandas as pd
-from matplotlib.patches import Polygon
-from matplotlib.collections import PatchCollection
+import matplotlib
+from matplotlib.collections import PolyCollection
 import matplotlib.pyplot as plt
-from mpl_toolkits.basemap import Basemap
+from shapely.ops import unary_union
 
+from grim_opt.cache import cache_dir, hash_arrays, save_npy_atomic
+from grim_opt.config import PlotRegionsPaths, RegionMapColumn
+from grim_opt.config_defaults import config_plot_regions_default
 import grim_opt.helpers as hp
-import grim_opt.path_helpers as ps
+from grim_opt.input_cache import read_csv_cached
 
 
 plt.switch_backend('agg')
 
-path_region_names = ps.mkdefaultpath(ps.DEFAULT_EXP_ROOT, ps.FileID.REGION_NAMES)
-path_gis_nlregions = ps.mkdefaultpath(ps.DEFAULT_EXP_ROOT, ps.FileID.POLYGONS_BASE)
-
-path_noCap = ps.mkdefaultpath_arg(ps.DEFAULT_EXP_ROOT, ps.FileID.OPTIMIZED_GENCAP_RENEW, 'no')
-path_geno_20 = ps.mkdefaultpath_arg(ps.DEFAULT_EXP_ROOT, ps.FileID.OPTIMIZED_GENCAP_RENEW, '20')
-path_geno_50 = ps.mkdefaultpath_arg(ps.DEFAULT_EXP_ROOT, ps.FileID.OPTIMIZED_GENCAP_RENEW, '50')
-path_geno_80 = ps.mkdefaultpath_arg(ps.DEFAULT_EXP_ROOT, ps.FileID.OPTIMIZED_GENCAP_RENEW, '80')
-path_geno_100 = ps.mkdefaultpath_arg(ps.DEFAULT_EXP_ROOT, ps.FileID.OPTIMIZED_GENCAP_RENEW, '100')
-
-path_plot_capacities_regions = ps.mkdefaultpath(ps.DEFAULT_EXP_ROOT, ps.FileID.PLOT_CAPACITIES_REGIONS)
-
-cols = ["Onshore Wind(MW)", "Onshore Wind fraction", "Solar PV(MW)", "Solar PV fraction", "Biomass(MW)", "Coal(MW)", "CCGT(MW)"]
-rows = ["0% RES", "20% RES", "50% RES", "80% RES", "100% RES"]
-
-
-noCap = pd.read_csv(path_noCap, index_col=0)
-geno_20 = pd.read_csv(path_geno_20, index_col=0)
-geno_50 = pd.read_csv(path_geno_50, index_col=0)
-geno_80 = pd.read_csv(path_geno_80, index_col=0)
-geno_100 = pd.read_csv(path_geno_100, index_col=0)
-
-max_c = pd.read_csv(ps.mkdefaultpath(ps.DEFAULT_EXP_ROOT, ps.FileID.REGION_AREA_GENERATION), index_col=0)
-
-region_polys = hp.get_region_poly(path_gis_nlregions, path_region_names)
-region_names_list = hp.get_region_names_list(path_region_names)
-
-# plot
-# fig = plt.figure(figsize=(20, 20))
-fig, axes = plt.subplots(nrows=5, ncols=7, figsize=(40, 25))
-
-for ax, col in zip(axes[0], cols):
-    ax.set_title(col, size=20, weight='bold')
-
-for ax, row in zip(axes[:, 0], rows):
-    ax.text(-0.5, 0.5, row, transform=ax.transAxes, size=20, weight='bold')
-
-[axi.set_axis_off() for axi in axes.ravel()]
-
-# noCap
-ax = fig.add_subplot(5, 7, 1)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: noCap.loc["wind", :][k] for k, v in enumerate(region_names_list)}  # TODO: change this line
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(vmin=min(colvals), vmax=max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)  # TODO: change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-# cbar.ax.set_yticklabels(ticks)
-# cbar.update_ticks()
-# plt.title('Wind') # change this line
-
-ax = fig.add_subplot(5, 7, 2)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-# TODO: change this line
-region = {v: noCap.loc["wind", :][k] / max_c.loc[k]["Max_wind"] for k, v in enumerate(region_names_list)}
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(vmin=0, vmax=1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-sm.set_array([])
-# sm.set_clim(vmin=0, vmax=1) # change this line
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Wind') # change this line
-
-# subplot
-ax = fig.add_subplot(5, 7, 3)  # TODO: change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: 0 for k, v in enumerate(region_names_list)}  # TODO: change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap)
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Solar') # change this line
-
-ax = fig.add_subplot(5, 7, 4)  # TODO: change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: 0 for k, v in enumerate(region_names_list)}  # TODO: change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# sm.set_clim(vmin=0, vmax=1) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-ax = fig.add_subplot(5, 7, 5)  # TODO: change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: 0 for k, v in enumerate(region_names_list)}  # TODO: change this line
-colvals = region.values()
-
-cmap = plt.cm.Greens
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-# subplot
-ax = fig.add_subplot(5, 7, 6)  # TODO: change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49, resolution="c"
-)
-
-region = {v: noCap.loc["coal", :][k] for k, v in enumerate(region_names_list)}  # TODO: change this line
-colvals = region.values()
-
-cmap = plt.cm.Purples
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000)  # TODO: change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Coal')  # TODO: change this line
-
-# subplot
-ax = fig.add_subplot(5, 7, 7)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49, resolution="c"
-)
-
-region = {v: noCap.loc["CCGT", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Greys
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('CCGT') # change this line
-
-
-# 20%
-ax = fig.add_subplot(5, 7, 8)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_20.loc["wind", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Wind') # change this line
-
-
-ax = fig.add_subplot(5, 7, 9)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49, resolution="c"
-)
-
-region = {v: geno_20.loc["wind", :][k] / max_c.loc[k]["Max_wind"] for k, v in
-          enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-# subplot
-ax = fig.add_subplot(5, 7, 10)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: 0 for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Solar') # change this line
-
-
-# subplot
-ax = fig.add_subplot(5, 7, 11)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49, resolution="c"
-)
-
-region = {v: 0 for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-ax = fig.add_subplot(5, 7, 12)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: 0 for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Greens
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-# subplot
-ax = fig.add_subplot(5, 7, 13)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_20.loc["coal", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Purples
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Coal') # change this line
-
-# subplot
-ax = fig.add_subplot(5, 7, 14)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_20.loc["CCGT", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Greys
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('CCGT') # change this line
-
-
-# 50%
-ax = fig.add_subplot(5, 7, 15)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_50.loc["wind", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Wind') # change this line
-
-ax = fig.add_subplot(5, 7, 16)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_50.loc["wind", :][k] / max_c.loc[k]["Max_wind"] for k, v in
-          enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-# subplot
-ax = fig.add_subplot(5, 7, 17)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_50.loc["solar", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Solar') # change this line
-
-
-ax = fig.add_subplot(5, 7, 18)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_50.loc["solar", :][k] / max_c.loc[k]["Max_solar"] for k, v in
-          enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-ax = fig.add_subplot(5, 7, 19)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: 0 for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Greens
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-# subplot
-ax = fig.add_subplot(5, 7, 20)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_50.loc["coal", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Purples
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Coal') # change this line
-
-# subplot
-ax = fig.add_subplot(5, 7, 21)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_50.loc["CCGT", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Greys
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('CCGT') # change this line
-
-
-# 80%
-ax = fig.add_subplot(5, 7, 22)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_80.loc["wind", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Wind') # change this line
-
-ax = fig.add_subplot(5, 7, 23)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_80.loc["wind", :][k] / max_c.loc[k]["Max_wind"] for k, v in
-          enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Wind') # change this line
-
-
-# subplot
-ax = fig.add_subplot(5, 7, 24)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_80.loc["solar", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Solar') # change this line
-
-
-ax = fig.add_subplot(5, 7, 25)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_80.loc["solar", :][k] / max_c.loc[k]["Max_solar"] for k, v in
-          enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-ax = fig.add_subplot(5, 7, 26)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_80.loc["biomass", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Greens
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-# subplot
-ax = fig.add_subplot(5, 7, 27)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_80.loc["coal", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Purples
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Coal') # change this line
-
-# subplot
-ax = fig.add_subplot(5, 7, 28)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_80.loc["CCGT", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Greys
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('CCGT') # change this line
-
-
-# 100%
-ax = fig.add_subplot(5, 7, 29)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_100.loc["wind", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Wind') # change this line
-
-ax = fig.add_subplot(5, 7, 30)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_100.loc["wind", :][k] / max_c.loc[k]["Max_wind"] for k, v in
-          enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Blues
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Wind') # change this line
-
-
-# subplot
-ax = fig.add_subplot(5, 7, 31)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_100.loc["solar", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Solar') # change this line
-
-ax = fig.add_subplot(5, 7, 32)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_100.loc["solar", :][k] / max_c.loc[k]["Max_solar"] for k, v in
-          enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Reds
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-ax = fig.add_subplot(5, 7, 33)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: geno_100.loc["biomass", :][k] for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Greens
-norm = plt.Normalize(min(colvals), max(colvals))
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(min(colvals), max(colvals), 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-
-# subplot
-ax = fig.add_subplot(5, 7, 34)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: 0 for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Purples
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Coal') # change this line
-
-# subplot
-ax = fig.add_subplot(5, 7, 35)  # change this line
-
-baseMap = Basemap(
-    projection="merc",
-    llcrnrlat=50.62, urcrnrlat=53.72,
-    llcrnrlon=3.25, urcrnrlon=7.49,
-    resolution="c"
-)
-
-region = {v: 0 for k, v in enumerate(region_names_list)}  # change this line
-colvals = region.values()
-
-cmap = plt.cm.Greys
-norm = plt.Normalize(0, 1)
-patches = []
-
-for name in region_names_list:
-    xy = np.squeeze(np.array(region_polys[name].exterior.coords[:]))
-    x_proj, y_proj = baseMap(xy[:, 0], xy[:, 1])
-    ax.plot(x_proj, y_proj, color="black")
-    color = cmap(norm(region[name]))
-    patches.append(Polygon(np.array(list(zip(x_proj, y_proj))), True, color=color))
-
-baseMap.drawcountries(color="white")
-baseMap.drawcoastlines(color="white")
-ax.add_collection(PatchCollection(patches, match_original=True, edgecolor='k', linewidths=1., zorder=2))
-
-sm = plt.cm.ScalarMappable(cmap=cmap)
-# plt.cm.ScalarMappable(cmap=cmap, norm=norm).set_clim(vmin=0, vmax=9000) # change this line
-sm.set_array([])
-cbar = fig.colorbar(sm, ax=ax)
-ticks = np.linspace(0, 1, 6)
-cbar.set_ticks(ticks)
-cbar.ax.tick_params(labelsize=15)
-# plt.title('Coal') # change this line
+MAP_BOUNDS = dict(llcrnrlat=50.62, urcrnrlat=53.72, llcrnrlon=3.25, urcrnrlon=7.49)  # the Netherlands
+MAP_CRS = 'EPSG:3395'  # Mercator on the WGS 84 ellipsoid
+PANEL_SIZE = (5.7, 5.0)  # inches, map and colorbar
+PANEL_DPI = 100
+# Natural Earth (public domain) 1:110m admin-0 countries, clipped to a margin around MAP_BOUNDS
+COUNTRIES_PATH = Path(__file__).parent / 'data' / 'ne_110m_countries_nl.geojson'
+
+
+def plot_capacities_regions(
+        paths: PlotRegionsPaths,
+        scenarios: List[Tuple[str, Path]],
+        columns: List[RegionMapColumn],
+        workers: Optional[int] = None,
+        ):
+    """
+    Plot the maps of the optimized generation capacity per region, for every scenario and technology
+
+    :param paths: Struct with all the filepaths (input and output) needed for this step
+    :type paths: PlotRegionsPaths
+    :param scenarios: (label, optimized_gencap file) of every row of maps
+    :param columns: Technology (and how it is shown) of every column of maps
+    :param workers: If given (> 1), the maps are rendered in parallel by this many worker processes
+    """
+    region_polys = hp.get_region_poly(paths.gis_nlregions, paths.region_names)
+    region_names_list = hp.get_region_names_list(paths.region_names)
+
+    # project every region boundary once, for all the panels
+    rings = [project_lonlat(region_polys[name].exterior.coords) for name in region_names_list]
+    extent = map_extent()
+    countries = country_rings()
+
+    # every file is parsed only once per version of its contents (ingest cache)
+    max_c = read_csv_cached(paths.region_area_generation, index_col=0)
+    panels = []
+    for _, gencap_path in scenarios:
+        df_gencap = read_csv_cached(gencap_path, index_col=0)
+        panels += [panel_data(df_gencap, column, max_c, len(region_names_list)) for column in columns]
+
+    # only the panels whose inputs changed since they were last rendered are rendered again
+    map_key = hash_arrays(*rings, *countries, extent, [*PANEL_SIZE, PANEL_DPI]) + matplotlib.__version__
+    panel_paths = [cache_dir('plots', 'panels') / f'{panel_fingerprint(map_key, *panel)}.npy' for panel in panels]
+    missing = [i for i, panel_path in enumerate(panel_paths) if not panel_path.exists()]
+
+    if missing:
+        # the background is the same for all the panels: rendered once, and kept in the cache with the panels
+        background_path = cache_dir('plots', 'backgrounds') / f'{map_key}.npy'
+        if background_path.exists():
+            background = np.load(background_path)
+        else:
+            outline = unary_union([region_polys[name] for name in region_names_list])
+            background = render_background(
+                countries, [project_lonlat(polygon.exterior.coords) for polygon in getattr(outline, 'geoms', [outline])],
+                extent)
+            save_npy_atomic(background_path, background)
+
+        if workers is not None and workers > 1 and len(missing) > 1:
+            ctx = multiprocessing.get_context('spawn')
+            pool = ctx.Pool(processes=min(workers, len(missing)), initializer=_init_panel_worker,
+                            initargs=(rings, background, extent))
+            images = pool.imap(_render_panel_task, [panels[i] for i in missing])
+        else:
+            pool = None
+            images = (render_panel(rings, background, extent, *panels[i]) for i in missing)
+
+        for i, image in zip(missing, images):
+            save_npy_atomic(panel_paths[i], image)
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    row_labels = [label for label, _ in scenarios]
+    column_titles = [column.title for column in columns]
+    figure_key = hashlib.sha256(repr(([p.stem for p in panel_paths], row_labels, column_titles)).encode()).hexdigest()
+    figure_path = cache_dir('plots') / f'{figure_key}.png'
+    if not figure_path.exists():
+        tmp = figure_path.with_name(f'{figure_path.stem}.{os.getpid()}.tmp.png')
+        compose_panels([np.load(panel_path) for panel_path in panel_paths], row_labels, column_titles, tmp)
+        os.replace(tmp, figure_path)
+    shutil.copyfile(figure_path, paths.plot_capacities_regions)
+
+
+def panel_data(df_gencap: pd.DataFrame, column: RegionMapColumn, max_c: pd.DataFrame, num_regions: int
+               ) -> Tuple[np.ndarray, str, float, float]:
+    """
+    :return: The values to show per region (in the order of the region names), the colormap, and the bounds of the
+    color scale. A technology missing from the scenario is shown as zero.
+    """
+    if column.technology in df_gencap.index:
+        values = df_gencap.loc[column.technology].to_numpy(dtype=float)[:num_regions]
+    else:
+        values = np.zeros(num_regions)
+
+    if column.relative_to is not None:
+        values = values / max_c[column.relative_to].to_numpy(dtype=float)[:num_regions]
+        vmin, vmax = 0.0, 1.0
+    else:
+        vmin, vmax = float(values.min()), float(values.max())
+
+    return values, column.cmap, vmin, vmax
+
+
+def panel_fingerprint(map_key: str, values: np.ndarray, cmap_name: str, vmin: float, vmax: float) -> str:
+    """
+    :param map_key: Fingerprint of everything shared by the panels (region boundaries, extent, size of the panels)
+    :return: Fingerprint of everything a panel is rendered from
+    """
+    return hashlib.sha256(f'{map_key}|{hash_arrays(values)}|{cmap_name}|{vmin!r}|{vmax!r}'.encode()).hexdigest()
+
+
+def project_lonlat(coords) -> np.ndarray:
+    """
+    :param coords: Vertices (lon, lat), shape = (vertices, 2)
+    :return: The vertices in the (Mercator) coordinates of the maps, shape = (vertices, 2)
+    """
+    return hp.project_coords(coords, 'EPSG:4326', MAP_CRS)
+
+
+def map_extent() -> Tuple[float, float, float, float]:
+    """
+    :return: (left, right, bottom, top) of the maps, in map coordinates
+    """
+    (left, bottom), (right, top) = project_lonlat([
+        (MAP_BOUNDS['llcrnrlon'], MAP_BOUNDS['llcrnrlat']), (MAP_BOUNDS['urcrnrlon'], MAP_BOUNDS['urcrnrlat']),
+    ])
+    return left, right, bottom, top
+
+
+def country_rings() -> List[np.ndarray]:
+    """
+    :return: Projected boundary of every country (part) of the background layer
+    """
+    with open(COUNTRIES_PATH) as f:
+        features = json.load(f)['features']
+
+    rings = []
+    for feature in features:
+        geometry = feature['geometry']
+        polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+        rings += [project_lonlat(polygon[0]) for polygon in polygons]
+    return rings
+
+
+def render_background(
+        countries: List[np.ndarray], outline: List[np.ndarray], extent: Tuple[float, float, float, float],
+        ) -> np.ndarray:
+    """
+    Render the sea, the land with its coastlines and country borders, and the outline of the whole area, drawn under
+    every map, once as an image covering the extent of the maps
+
+    :param countries: Projected rings of the countries (`country_rings`)
+    :param outline: Projected rings of the outline of all the regions
+    :return: The image, shape = (height, width, 4) (RGBA)
+    """
+    fig = plt.figure(figsize=PANEL_SIZE, dpi=2 * PANEL_DPI)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.add_collection(PolyCollection(countries, facecolors='whitesmoke', edgecolors='grey', linewidths=1.5))
+    ax.add_collection(PolyCollection(outline, facecolors='whitesmoke', edgecolors='grey', linewidths=3.))
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_axis_off()
+    fig.patch.set_facecolor('aliceblue')  # the sea
+
+    fig.canvas.draw()
+    image = np.array(fig.canvas.buffer_rgba())
+    plt.close(fig)
+    return image
+
+
+def render_panel(
+        rings: List[np.ndarray], background: np.ndarray, extent: Tuple[float, float, float, float],
+        values: np.ndarray, cmap_name: str, vmin: float, vmax: float,
+        ) -> np.ndarray:
+    """
+    Render one map, with its colorbar.
+
+    :param rings: Projected boundary of every region
+    :param background: Image from `render_background`, covering the extent
+    :param values: Value of every region
+    :return: The image, shape = (height, width, 4) (RGBA)
+    """
+    fig = plt.figure(figsize=PANEL_SIZE, dpi=PANEL_DPI)
+    ax = fig.add_subplot(1, 1, 1)
+
+    cmap = plt.get_cmap(cmap_name)
+    norm = plt.Normalize(vmin=vmin, vmax=vmax)
+
+    ax.imshow(background, extent=extent, zorder=1)
+    ax.add_collection(PolyCollection(rings, facecolors=cmap(norm(values)), edgecolors='k', linewidths=1., zorder=2))
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    ax.set_aspect('equal')
+    ax.set_axis_off()
+
+    sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
+    sm.set_array([])
+    cbar = fig.colorbar(sm, ax=ax)
+    cbar.set_ticks(np.linspace(vmin, vmax, 6))
+    cbar.ax.tick_params(labelsize=15)
+
+    fig.canvas.draw()
+    image = np.array(fig.canvas.buffer_rgba())
+    plt.close(fig)
+    return image
+
+
+def compose_panels(images: List[np.ndarray], row_labels: List[str], column_titles: List[str], out_path: Path):
+    """
+    Put the panels (row by row) together into one figure, with the titles of the columns and the labels of the rows
+    """
+    nrows, ncols = len(row_labels), len(column_titles)
+    fig, axes = plt.subplots(nrows=nrows, ncols=ncols, figsize=(ncols * PANEL_SIZE[0], nrows * PANEL_SIZE[1]),
+                             squeeze=False)
+
+    for ax, image in zip(axes.ravel(), images):
+        ax.imshow(image, interpolation='none')
+    [axi.set_axis_off() for axi in axes.ravel()]
+
+    for ax, col in zip(axes[0], column_titles):
+        ax.set_title(col, size=20, weight='bold')
+
+    for ax, row in zip(axes[:, 0], row_labels):
+        ax.text(-0.05, 0.5, row, transform=ax.transAxes, size=20, weight='bold', ha='right', va='center')
+
+    fig.tight_layout()
+    fig.savefig(out_path, bbox_inches='tight', dpi=PANEL_DPI)
+    plt.close(fig)
+
+
+_panel_worker_state = {}
+
+
+def _init_panel_worker(rings: List[np.ndarray], background: np.ndarray, extent: Tuple[float, float, float, float]):
+    _panel_worker_state['map'] = (rings, background, extent)
+
+
+def _render_panel_task(panel: Tuple[np.ndarray, str, float, float]) -> np.ndarray:
+    return render_panel(*_panel_worker_state['map'], *panel)
+
+
+def default_plot_capacities_regions():
+    plot_capacities_regions(
+        paths=config_plot_regions_default.paths,
+        scenarios=config_plot_regions_default.scenarios,
+        columns=config_plot_regions_default.columns,
+        workers=config_plot_regions_default.workers,
+    )
+
 
-plt.savefig(path_plot_capacities_regions, bbox_inches='tight', dpi=200)
+if __name__ == '__main__':
+    default_plot_capacities_regions()
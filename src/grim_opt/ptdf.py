@@ -0,0 +1,102 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Power transfer distribution factors (PTDF) of the transmission network, in the DC power flow approximation.
+"""
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+from grim_opt.cache import cache_dir, hash_arrays, save_npy_atomic
+
+
+def incidence_matrix(lines: pd.DataFrame, num_nodes: int) -> sp.csr_matrix:
+    """
+    Line-node incidence matrix, shape = (lines, nodes): +1 at 'region1' and -1 at 'region2' of every line
+    """
+    num_lines = len(lines.index)
+    rows = np.repeat(np.arange(num_lines), 2)
+    cols = np.column_stack([lines['region1'].to_numpy(), lines['region2'].to_numpy()]).ravel()
+    vals = np.tile([1.0, -1.0], num_lines)
+    return sp.csr_matrix((vals, (rows, cols)), shape=(num_lines, num_nodes))
+
+
+def compute_ptdf(lines: pd.DataFrame, num_nodes: int) -> np.ndarray:
+    """
+    PTDF with node 0 as slack node: PTDF = Bd A (A^T Bd A)^-1, with the slack row and column of A^T Bd A removed.
+
+    Instead of inverting the reduced susceptance matrix, it is factorized once (sparse LU) and solved for the
+    right-hand sides (Bd A)^T, which scales to networks with thousands of nodes.
+
+    :param lines: The line table (columns 'region1', 'region2' and 'x' are used)
+    :param num_nodes: Number of nodes of the network
+
+    :return: Dense PTDF, shape = (lines, nodes). The column of the slack node is zero.
+    """
+    A = incidence_matrix(lines, num_nodes)
+    Bd = sp.diags(1 / lines['x'].to_numpy(dtype=float))
+    M1 = (Bd @ A).tocsc()
+    M2 = (A.T @ Bd @ A).tocsc()
+
+    # node 0 is slack node; M2 is symmetric, so PTDF_slack^T = M2[1:, 1:]^-1 M1[:, 1:]^T
+    lu = splu(M2[1:, 1:])
+    PTDF_slack = lu.solve(M1[:, 1:].T.toarray()).T
+
+    return np.hstack((np.zeros([len(lines.index), 1]), PTDF_slack))
+
+
+def cached_ptdf(lines: pd.DataFrame, num_nodes: int) -> np.ndarray:
+    """
+    Same as `compute_ptdf`, but stored in the on-disk cache, keyed by the network topology and reactances: changing
+    other columns of the line table (e.g. capacities or lengths) does not trigger a recomputation.
+    """
+    key = hash_arrays(
+        lines['region1'].to_numpy(dtype=np.int64), lines['region2'].to_numpy(dtype=np.int64),
+        lines['x'].to_numpy(dtype=float), num_nodes,
+    )
+    path = cache_dir('ptdf') / f'{key}.npy'
+    if path.exists():
+        return np.load(path)
+
+    PTDF = compute_ptdf(lines, num_nodes)
+    save_npy_atomic(path, PTDF)
+    return PTDF
+
+
+def sparsify_ptdf(PTDF: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Drop (set to zero) the PTDF entries whose magnitude is below the threshold
+    """
+    return np.where(np.abs(PTDF) < threshold, 0.0, PTDF)
+
+
+def flow_nonzeros_per_time_step(PTDF: np.ndarray, num_lines: int, num_nodes: int, eliminate_auxiliary: bool) -> dict:
+    """
+    Number of constraint matrix nonzeros per time step of the network part of the model (net injection terms of the node
+    power balance, flow definitions, and the transmission limits), for each flow formulation:
+    'ptdf' (line flows as the nonzero PTDF entries times the net injections, plus the arbitrage balance) and
+    'angle' (line flows from their two end angles, plus one flow balance row per node)
+
+    :param eliminate_auxiliary: If True, count the model without the F (and, for 'angle', Z_net) variables, whose
+    defining expressions are then substituted into the transmission limits (and the node power balance)
+    """
+    nnz = int(np.count_nonzero(PTDF))
+    if eliminate_auxiliary:
+        return {
+            # Z_net in node_power_balance and arbitrage_balance; PTDF Z_net and K_T in both transmission limits
+            'ptdf': 2 * num_nodes + 2 * (nnz + num_lines),
+            # angle terms of the flows in node_power_balance; two angles and K_T in both transmission limits
+            'angle': (2 * num_lines + num_nodes) + 2 * 3 * num_lines,
+        }
+    return {
+        # Z_net in node_power_balance and arbitrage_balance; power_flow; F and K_T in both transmission limits
+        'ptdf': 2 * num_nodes + (nnz + num_lines) + 4 * num_lines,
+        # Z_net in node_power_balance; line_flow; node_flow_balance; F and K_T in both transmission limits
+        'angle': num_nodes + 3 * num_lines + (2 * num_lines + num_nodes) + 4 * num_lines,
+    }
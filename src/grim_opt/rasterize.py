@@ -0,0 +1,97 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Rasterization of polygons onto a regular grid, by scanline filling.
+"""
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MAX_BLOCK_CROSSINGS = 1 << 22  # scanlines x polygon edges handled at once, bounds the temporary arrays
+
+
+def rasterize_polygons(
+        shapes: Iterable[Tuple[int, np.ndarray]], x: np.ndarray, y: np.ndarray, fill: int = -1, dtype=np.int16,
+        overlaps: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None,
+        ) -> np.ndarray:
+    """
+    Burn polygons into a grid of labels, in a single pass over the polygons.
+
+    A grid cell gets the label of a polygon if its center (x[j], y[i]) is inside the polygon (even-odd rule, as in
+    `matplotlib.path.Path.contains_points`). Only the rows and columns of the bounding box of each polygon are visited;
+    every row is filled between successive crossings of the polygon edges. Where polygons overlap, the last one wins;
+the cells it takes over from the others can be collected in `overlaps`.
+
+    :param shapes: (label, ring) pairs, where ring is the array of vertices of the polygon, shape = (vertices, 2),
+    in the same coordinates as x and y
+    :param x: Coordinates of the grid columns (monotonic)
+    :param y: Coordinates of the grid rows (monotonic)
+    :param fill: Label of the cells outside all polygons
+    :param dtype: Type of the labels
+    :param overlaps: If given, (labels, cells) is appended to it for the cells that a polygon takes over from another
+    one, with the label they had before and their flat indices in the grid
+
+    :return: The labels, shape = (len(y), len(x))
+    """
+    labels = np.full((len(y), len(x)), fill, dtype=dtype)
+
+    # work on ascending coordinates, through a (writable) view of the labels
+    flip_y = len(y) > 1 and y[0] > y[-1]
+    flip_x = len(x) > 1 and x[0] > x[-1]
+    ys = y[::-1] if flip_y else y
+    xs = x[::-1] if flip_x else x
+    view = labels[::-1 if flip_y else 1, ::-1 if flip_x else 1]
+
+    for label, ring in shapes:
+        ring = np.asarray(ring, dtype=float)
+        x1, y1 = ring[:, 0], ring[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+
+        # bounding box pruning
+        i0, i1 = np.searchsorted(ys, y1.min(), 'left'), np.searchsorted(ys, y1.max(), 'right')
+        j0, j1 = np.searchsorted(xs, x1.min(), 'left'), np.searchsorted(xs, x1.max(), 'right')
+        if i0 >= i1 or j0 >= j1:
+            continue
+
+        block = max(1, MAX_BLOCK_CROSSINGS // len(ring))
+        for b0 in range(i0, i1, block):
+            b1 = min(b0 + block, i1)
+            inside = _scanline_fill(x1, y1, x2, y2, ys[b0:b1], xs[j0:j1])
+            if overlaps is not None:
+                previous = view[b0:b1, j0:j1]
+                ii, jj = np.nonzero(inside & (previous != fill) & (previous != label))
+                if ii.size:
+                    rows, cols = b0 + ii, j0 + jj
+                    rows = len(y) - 1 - rows if flip_y else rows
+                    cols = len(x) - 1 - cols if flip_x else cols
+                    overlaps.append((previous[ii, jj], rows * len(x) + cols))
+            view[b0:b1, j0:j1][inside] = label
+
+    return labels
+
+
+def _scanline_fill(x1, y1, x2, y2, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    :return: For each scanline y = rows[i] and column x = cols[j] (both ascending), whether (x, y) is inside the
+    polygon with edges (x1, y1) - (x2, y2)
+    """
+    yr = rows[:, None]
+    crosses = (y1 <= yr) != (y2 <= yr)  # half-open, so that a vertex on the scanline is counted once
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xi = np.where(crosses, x1 + (yr - y1) * (x2 - x1) / (y2 - y1), np.inf)
+    xi.sort(axis=1)
+    xi = xi[:, :crosses.sum(axis=1).max()]  # an even number of crossings per row, padded with inf
+
+    # cells with start <= x < end, for each pair of successive crossings (start, end)
+    idx = np.searchsorted(cols, xi.ravel(), 'left').reshape(xi.shape)
+    diff = np.zeros((len(rows), len(cols) + 1), dtype=np.int32)
+    row_idx = np.broadcast_to(np.arange(len(rows))[:, None], idx[:, 0::2].shape)
+    np.add.at(diff, (row_idx, idx[:, 0::2]), 1)
+    np.add.at(diff, (row_idx, idx[:, 1::2]), -1)
+
+    return np.cumsum(diff[:, :-1], axis=1) > 0
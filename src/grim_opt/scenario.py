@@ -0,0 +1,208 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+The processing steps of a scenario config file, run as a pipeline (`pipeline.py`): every step whose section is present
+in the config declares its input and output files, and is skipped when its outputs are up to date.
+"""
+from dataclasses import replace
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+
+from grim_opt.config import ConfigLandCover, ConfigGenerationArea, ConfigOptimization, ConfigPlotRegions, \
+    ConfigPlotTotals
+from grim_opt.config_parse import read_from_yaml
+from grim_opt.path_helpers import FileID, variant_path
+from grim_opt.pipeline import PipelineStep, run_pipeline
+
+
+def run_scenario(cfg_path: Path, solver_threads: Optional[int] = None, force: bool = False):
+    """
+    Run all the processing steps whose section is present in a scenario config file, except those whose outputs are
+    up to date with their inputs and their section of the config.
+    The module of every step (and its dependencies) is imported only if the step runs.
+
+    :param cfg_path: Path to the scenario config file (YAML)
+    :param solver_threads: If given, overrides the number of threads of the optimization solver (solver_params.threads)
+    :param force: If True, run all the steps, even those whose outputs are up to date
+    """
+    run_pipeline(scenario_steps(cfg_path, solver_threads), force=force)
+
+
+def scenario_steps(cfg_path: Path, solver_threads: Optional[int] = None) -> List[PipelineStep]:
+    """
+    :return: The steps whose section is present in the scenario config file, in the order in which they must run
+    """
+    cfg_landcover, cfg_generation_area, cfg_opt, cfg_plot_regions, cfg_plot_totals = read_from_yaml(cfg_path)
+    steps = []
+
+    # Perform this step only of the 'land_cover' section is present in the YAML
+    if cfg_landcover is not None:
+        paths = cfg_landcover.paths
+        steps.append(PipelineStep(
+            name='land_cover',
+            inputs=[
+                (FileID.CORINE_LAND_COVER, paths.corine_land_cover),
+                (FileID.REGION_NAMES, paths.region_names),
+                (FileID.POLYGONS_BASE, paths.gis_nlregions),
+                (FileID.POLYGONS_EXCLUSION, paths.exclusion_poly),
+            ],
+            outputs=[(FileID.REGION_AREA_LAND_COVER_CLASSES, paths.region_area_land_cover)] + [
+                (FileID.REGION_AREA_LAND_COVER_CLASSES, variant_path(paths.region_area_land_cover, variant.name))
+                for variant in cfg_landcover.variants
+            ],
+            params=replace(cfg_landcover, tile_size=None, workers=None),
+            run=partial(__run_land_cover, cfg_landcover),
+        ))
+
+    # Perform this step only of the 'generation_area' section is present in the YAML
+    if cfg_generation_area is not None:
+        paths = cfg_generation_area.paths
+        steps.append(PipelineStep(
+            name='generation_area',
+            inputs=[
+                (FileID.REGION_AREA_LAND_COVER_CLASSES, paths.region_area_land_cover),
+                (FileID.REGION_NAMES, paths.region_names),
+            ],
+            outputs=[(FileID.REGION_AREA_GENERATION, paths.region_area_generation)],
+            params=cfg_generation_area,
+            run=partial(__run_generation_area, cfg_generation_area),
+        ))
+
+    # Perform this step only of the 'optimization' section is present in the YAML
+    if cfg_opt is not None:
+        paths = cfg_opt.paths
+        omega_paths = [paths.for_omega(omega) for omega in cfg_opt.omega_sweep] if cfg_opt.omega_sweep else [paths]
+        # the step is not run again for another number of solver threads (same for the number of worker processes of
+        # the other steps)
+        params = replace(cfg_opt, solver_params=replace(cfg_opt.solver_params, threads=None))
+        if solver_threads is not None:
+            cfg_opt = replace(cfg_opt, solver_params=replace(cfg_opt.solver_params, threads=solver_threads))
+        steps.append(PipelineStep(
+            name='optimization',
+            inputs=[
+                (FileID.REGION_AREA_GENERATION, paths.region_area_generation),
+                (FileID.PARAMETERS_TECHNO_ECON, paths.params_techno_econ),
+                (FileID.ELECTRICITY_GENCAP_EXISTING, paths.gencap_existing),
+                (FileID.ELECTRICITY_TRANSCAP_CONNECTIONS, paths.transcap_connections),
+                (FileID.ELECTRICITY_DEMAND, paths.electricity_demand),
+                (FileID.ELECTRICITY_GENCAP_FACTORS_NEW_WIND, paths.electricity_gencap_factors_new_wind),
+                (FileID.ELECTRICITY_GENCAP_FACTORS_NEW_SOLAR, paths.electricity_gencap_factors_new_solar),
+            ],
+            outputs=[
+                output
+                for p in omega_paths
+                for output in [(FileID.OPTIMIZED_GENCAP_RENEW, p.optimized_gencap_renew),
+                               (FileID.OPTIMIZED_TRANSCAP_RENEW, p.optimized_transcap_renew)]
+            ],
+            params=params,
+            run=partial(__run_optimization, cfg_opt),
+        ))
+
+    # Perform this step only of the 'plot_capacities_regions' section is present in the YAML
+    if cfg_plot_regions is not None:
+        paths = cfg_plot_regions.paths
+        steps.append(PipelineStep(
+            name='plot_capacities_regions',
+            inputs=[
+                (FileID.REGION_NAMES, paths.region_names),
+                (FileID.POLYGONS_BASE, paths.gis_nlregions),
+                (FileID.REGION_AREA_GENERATION, paths.region_area_generation),
+            ] + [(FileID.OPTIMIZED_GENCAP_RENEW, gencap_path) for _, gencap_path in cfg_plot_regions.scenarios],
+            outputs=[(FileID.PLOT_CAPACITIES_REGIONS, paths.plot_capacities_regions)],
+            params=replace(cfg_plot_regions, workers=None),
+            run=partial(__run_plot_regions, cfg_plot_regions),
+        ))
+
+    # Perform this step only of the 'plot_capacities_totals' section is present in the YAML
+    if cfg_plot_totals is not None:
+        steps.append(PipelineStep(
+            name='plot_capacities_totals',
+            inputs=[
+                input_file
+                for _, gencap_path, transcap_path in cfg_plot_totals.scenarios
+                for input_file in [(FileID.OPTIMIZED_GENCAP_RENEW, gencap_path),
+                                   (FileID.OPTIMIZED_TRANSCAP_RENEW, transcap_path)]
+            ],
+            outputs=[(FileID.PLOT_CAPACITIES_TOTALS, cfg_plot_totals.paths.plot_capacities_totals)],
+            params=cfg_plot_totals,
+            run=partial(__run_plot_totals, cfg_plot_totals),
+        ))
+
+    return steps
+
+
+def __run_land_cover(cfg_landcover: ConfigLandCover):
+    from grim_opt.land_cover import perform_land_cover
+
+    perform_land_cover(
+        paths=cfg_landcover.paths,
+        out_shp=cfg_landcover.out_shp,
+        r=cfg_landcover.r,
+        class_artificial_indices=cfg_landcover.class_artificial_indices,
+        tile_size=cfg_landcover.tile_size,
+        workers=cfg_landcover.workers,
+        exclusion_method=cfg_landcover.exclusion_method,
+        variants=cfg_landcover.variants,
+    )
+
+
+def __run_generation_area(cfg_generation_area: ConfigGenerationArea):
+    from grim_opt.generation_area import perform_generation_area
+
+    perform_generation_area(
+        paths=cfg_generation_area.paths,
+        suitability=cfg_generation_area.suitability,
+        cell_area=cfg_generation_area.cell_area,
+    )
+
+
+def __run_optimization(cfg_opt: ConfigOptimization):
+    from grim_opt.optimization import perform_optimization, perform_optimization_sweep
+
+    if cfg_opt.omega_sweep:
+        perform_optimization_sweep(
+            paths=cfg_opt.paths,
+            et_params=cfg_opt.et_params,
+            solver_params=cfg_opt.solver_params,
+            num_rows_cost_params=cfg_opt.num_rows_cost_params,
+            other_params=cfg_opt.other_params,
+            formulation_params=cfg_opt.formulation_params,
+            aggregation_params=cfg_opt.aggregation_params,
+            omegas=cfg_opt.omega_sweep,
+        )
+    else:
+        perform_optimization(
+            paths=cfg_opt.paths,
+            et_params=cfg_opt.et_params,
+            solver_params=cfg_opt.solver_params,
+            num_rows_cost_params=cfg_opt.num_rows_cost_params,
+            other_params=cfg_opt.other_params,
+            formulation_params=cfg_opt.formulation_params,
+            aggregation_params=cfg_opt.aggregation_params,
+        )
+
+
+def __run_plot_regions(cfg_plot_regions: ConfigPlotRegions):
+    from grim_opt.plot_capacities_regions import plot_capacities_regions
+
+    plot_capacities_regions(
+        paths=cfg_plot_regions.paths,
+        scenarios=cfg_plot_regions.scenarios,
+        columns=cfg_plot_regions.columns,
+        workers=cfg_plot_regions.workers,
+    )
+
+
+def __run_plot_totals(cfg_plot_totals: ConfigPlotTotals):
+    from grim_opt.plot_capacities_totals import plot_capacities_totals
+
+    plot_capacities_totals(
+        paths=cfg_plot_totals.paths,
+        scenarios=cfg_plot_totals.scenarios,
+    )
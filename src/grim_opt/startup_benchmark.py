@@ -0,0 +1,71 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Startup time benchmark: how long a fresh Python process takes to import the entry points of grim_opt (and to print
+the help of the executables), and which heavy third-party packages each of them loads.
+
+Usage: `python -m grim_opt.startup_benchmark [--repeat 5]`
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+# (name, code run in a fresh process)
+CASES = [
+    ('python', 'pass'),
+    ('grim_opt --help', 'import sys; sys.argv = ["grim_opt", "--help"]\nfrom grim_opt.cli_app import main\ntry:\n    main()\nexcept SystemExit:\n    pass'),
+    ('import grim_opt.cli_app', 'import grim_opt.cli_app'),
+    ('import grim_opt.batch', 'import grim_opt.batch'),
+    ('import grim_opt.scenario', 'import grim_opt.scenario'),
+    ('import grim_opt.config_parse', 'import grim_opt.config_parse'),
+    ('import grim_opt.land_cover', 'import grim_opt.land_cover'),
+    ('import grim_opt.generation_area', 'import grim_opt.generation_area'),
+    ('import grim_opt.optimization', 'import grim_opt.optimization'),
+    ('import grim_opt.plot_capacities_regions', 'import grim_opt.plot_capacities_regions'),
+    ('import grim_opt.plot_capacities_totals', 'import grim_opt.plot_capacities_totals'),
+]
+
+HEAVY_PACKAGES = [
+    'numpy', 'pandas', 'scipy', 'matplotlib', 'seaborn', 'pyomo', 'netCDF4', 'pyproj', 'shapely', 'geojson', 'yaml',
+]
+
+
+def time_case(code: str, repeat: int) -> Tuple[List[float], List[str], str]:
+    """
+    :return: The wall time of every run (s), the heavy packages loaded, and the error output if the code failed
+    """
+    report = f'\nimport sys, json\nprint(json.dumps([m for m in {HEAVY_PACKAGES!r} if m in sys.modules]))'
+    times, loaded = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', code + report], capture_output=True, text=True)
+        times.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            return times, [], proc.stderr.strip().splitlines()[-1]
+        loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return times, loaded, ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the startup time of the grim_opt entry points')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh processes per case (default: 5)')
+    args = parser.parse_args()
+
+    print(f'{"case":<42} {"min (s)":>8} {"median (s)":>11}  heavy packages loaded')
+    for name, code in CASES:
+        times, loaded, error = time_case(code, args.repeat)
+        detail = f'FAILED: {error}' if error else ', '.join(loaded)
+        print(f'{name:<42} {min(times):>8.3f} {statistics.median(times):>11.3f}  {detail}')
+
+
+if __name__ == '__main__':
+    main()
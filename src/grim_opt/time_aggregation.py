@@ -0,0 +1,119 @@
+#  Copyright 2021 Technische Universiteit Delft
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated documentation files (the "Software"), to deal in the Software without restriction, including without limitation the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Aggregation of the optimization time series into a few representative periods (e.g. days or weeks), by clustering.
+"""
+from dataclasses import replace
+from typing import Tuple
+
+import numpy as np
+from scipy.cluster.vq import kmeans2
+from scipy.spatial.distance import cdist
+
+from grim_opt.config import OptOtherParams, OptAggregationParams
+from grim_opt.optimization_inputs import OptimizationInputs, RepresentativePeriods
+
+
+def aggregate_inputs(
+        inputs: OptimizationInputs, N: np.ndarray, other_params: OptOtherParams, aggregation_params: OptAggregationParams,
+        ) -> Tuple[OptimizationInputs, OptOtherParams]:
+    """
+    Replace the time series of the inputs (demand, wind and solar) by a few representative periods.
+
+    The original horizon `other_params.T` is cut in consecutive periods of `aggregation_params.period_length` time steps
+    (a trailing incomplete period is left out), and these are clustered together on all three time series at once.
+
+    :return: The aggregated inputs (with `periods` set) and the other parameters with the horizon (T, T2) of the
+    aggregated model. R is left unchanged, it is still the number of time steps represented.
+    """
+    L = aggregation_params.period_length
+    T = other_params.T
+    num_original = len(T) // L
+    if num_original < aggregation_params.num_periods:
+        raise ValueError(
+            f'Cannot aggregate {len(T)} time steps into {aggregation_params.num_periods} periods of {L} time steps'
+        )
+    hours = T[:num_original * L]
+
+    # One row per original period, all nodes and time steps of the three time series side by side
+    series = [arr[np.ix_(N, hours)] for arr in (inputs.arr_demand, inputs.arr_onshore, inputs.arr_solar)]
+    features = np.hstack([
+        (s / (np.abs(s).max() or 1)).reshape(len(N), num_original, L).transpose(1, 0, 2).reshape(num_original, -1)
+        for s in series
+    ])
+
+    if aggregation_params.method == 'kmeans':
+        labels = _kmeans(features, aggregation_params.num_periods, aggregation_params.seed)
+        representatives = None
+    elif aggregation_params.method == 'kmedoids':
+        labels, representatives = _kmedoids(features, aggregation_params.num_periods, aggregation_params.seed)
+    else:
+        raise ValueError(f'Unknown time aggregation method: "{aggregation_params.method}"')
+
+    # Clusters left empty by k-means are dropped
+    used, sequence = np.unique(labels, return_inverse=True)
+    counts = np.bincount(sequence)
+    weights = counts * len(T) / (num_original * L)
+
+    def representative_series(arr):
+        periods = arr[np.ix_(N, hours)].reshape(len(N), num_original, L)
+        if representatives is None:  # centroids
+            rep = np.stack([periods[:, sequence == k, :].mean(axis=1) for k in range(len(used))], axis=1)
+        else:  # medoids
+            rep = periods[:, representatives[used], :]
+        out = np.zeros([arr.shape[0], len(used) * L])
+        out[N, :] = rep.reshape(len(N), -1)
+        return out
+
+    aggregated_inputs = replace(
+        inputs,
+        arr_demand=representative_series(inputs.arr_demand),
+        arr_onshore=representative_series(inputs.arr_onshore),
+        arr_solar=representative_series(inputs.arr_solar),
+        periods=RepresentativePeriods(period_length=L, weights=weights, sequence=sequence),
+    )
+    aggregated_other_params = replace(
+        other_params,
+        T=np.arange(0, len(used) * L),
+        T2=np.arange(1, len(used) * L),
+    )
+
+    print(f'Time series aggregated: {len(T)} time steps -> {len(used)} periods of {L} time steps')
+
+    return aggregated_inputs, aggregated_other_params
+
+
+def _kmeans(features: np.ndarray, k: int, seed: int) -> np.ndarray:
+    _, labels = kmeans2(features, k, minit='++', seed=seed)
+    return labels
+
+
+def _kmedoids(features: np.ndarray, k: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Alternating (Voronoi iteration) k-medoids, initialized with the k-means clusters
+
+    :return: the cluster of each row, and for each cluster the row which is its medoid
+    """
+    dist = cdist(features, features)
+
+    labels = _kmeans(features, k, seed)
+    medoids = np.array([_medoid(dist, labels == c) for c in np.unique(labels)])
+
+    for _ in range(100):
+        labels = dist[:, medoids].argmin(axis=1)
+        new_medoids = np.array([_medoid(dist, labels == c) for c in np.unique(labels)])
+        if np.array_equal(new_medoids, medoids):
+            break
+        medoids = new_medoids
+
+    return dist[:, medoids].argmin(axis=1), medoids
+
+
+def _medoid(dist: np.ndarray, members: np.ndarray) -> int:
+    idx = np.flatnonzero(members)
+    return idx[dist[np.ix_(idx, idx)].sum(axis=1).argmin()]
@@ -0,0 +1,161 @@
+"""
+Shared fixtures: an isolated on-disk cache for every test, and small synthetic inputs.
+"""
+import json
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+from netCDF4 import Dataset
+
+from grim_opt.config import EnergyTechParams, OptOtherParams
+from grim_opt.helpers import project_coords
+from grim_opt.optimization_inputs import OptimizationInputs
+from grim_opt.ptdf import compute_ptdf
+
+# a patch of the Netherlands (near Amersfoort), in the coordinates of the CORINE raster (EPSG:3035)
+RASTER_ORIGIN = (3980000.0, 3220000.0)
+CELL = 100.0
+
+# land cover classes of the synthetic raster: counted classes, artificial surfaces (1 - 10) and no data (-128)
+RASTER_CLASSES = [1, 2, 3, 7, 12, 18, 20, 21, 23, 24, 25, -128]
+
+
+LAND_COVER_CONFIG = """\
+land_cover:
+  out_shp:
+    x: 60
+    y: 80
+  r: 2
+  class_artificial_indices: [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+"""
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch) -> Path:
+    path = tmp_path / 'cache'
+    monkeypatch.setenv('GRIM_OPT_CACHE_DIR', str(path))
+    return path
+
+
+def raster_axes(shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: x (ascending) and y (descending, north up) of the cell centers of a raster of the given shape
+    """
+    x = RASTER_ORIGIN[0] + CELL * (np.arange(shape[1]) + 0.5)
+    y = RASTER_ORIGIN[1] + CELL * (shape[0] - np.arange(shape[0]) - 0.5)
+    return x, y
+
+
+def random_land_cover(shape: Tuple[int, int], seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # mostly non-artificial classes, so that the exclusion buffers leave something to count
+    p = np.array([1, 1, 1, 1, 6, 6, 6, 6, 3, 3, 3, 1], dtype=float)
+    return rng.choice(RASTER_CLASSES, size=shape, p=p / p.sum()).astype(np.int16)
+
+
+def to_lonlat(ring) -> List[List[float]]:
+    return project_coords(ring, 'EPSG:3035', 'EPSG:4326').tolist()
+
+
+def write_land_cover_experiment(root: Path, shape: Tuple[int, int] = (60, 80), seed: int = 0) -> Path:
+    """
+    Write the inputs of the land_cover step in the conventional layout of an experiment: a random raster, three
+    municipalities in two regions (one of them shaped irregularly), and an exclusion polygon.
+
+    :return: The experiment folder
+    """
+    (root / 'inputs').mkdir(parents=True)
+    (root / 'outputs').mkdir()
+    x, y = raster_axes(shape)
+
+    with Dataset(root / 'inputs' / 'corine_land_cover__g100_clc12_V18_5_NL.nc', 'w') as nc:
+        nc.createDimension('y', shape[0])
+        nc.createDimension('x', shape[1])
+        nc.createVariable('y', 'f8', ('y',))[:] = y
+        nc.createVariable('x', 'f8', ('x',))[:] = x
+        nc.createVariable('data', 'i2', ('y', 'x'))[:] = random_land_cover(shape, seed)
+
+    x0, x1, y0, y1 = x.min(), x.max(), y.min(), y.max()
+    xm, ym = (x0 + x1) / 2, (y0 + y1) / 2
+    municipalities = {
+        'West': [(x0 + 150, y0 + 120), (xm, y0 + 260), (xm + 40, ym), (x0 + 330, y1 - 170)],
+        'Noordoost': [(xm + 40, ym), (x1 - 90, ym - 310), (x1 - 220, y1 - 60), (xm - 410, y1 - 140)],
+        'Zuidoost': [(xm, y0 + 260), (x1 - 130, y0 + 75), (x1 - 90, ym - 310), (xm + 40, ym)],
+    }
+    features = [
+        {'type': 'Feature', 'properties': {'name': name}, 'geometry': {'type': 'Polygon', 'coordinates': [
+            to_lonlat(ring + ring[:1])]}}
+        for name, ring in municipalities.items()
+    ]
+    with open(root / 'inputs' / 'polygons__export.geojson', 'w') as f:
+        json.dump({'type': 'FeatureCollection', 'features': features}, f)
+
+    with open(root / 'inputs' / 'region_names.csv', 'w') as f:
+        f.write('Westregio,Oostregio\nWest,Noordoost\n,Zuidoost\n')
+
+    exclusion = [(xm - 700, ym - 500), (xm + 300, ym - 650), (xm + 500, ym + 400), (xm - 400, ym + 600)]
+    with open(root / 'inputs' / 'polygons__veluwe_simplified.geojson', 'w') as f:
+        json.dump({'type': 'MultiPolygon', 'coordinates': [[to_lonlat(exclusion + exclusion[:1])]]}, f)
+
+    return root
+
+
+def land_cover_config(tile_size: Optional[int] = None, workers: Optional[int] = None) -> str:
+    """
+    :return: A scenario config with only the land_cover step, for the experiment of `write_land_cover_experiment`
+    """
+    config = LAND_COVER_CONFIG
+    if tile_size is not None:
+        config += f'  tile_size: {tile_size}\n'
+    if workers is not None:
+        config += f'  workers: {workers}\n'
+    return config
+
+
+def small_optimization_instance(R: int = 24, omega: float = 0.5, seed: int = 0
+                                ) -> Tuple[OptimizationInputs, EnergyTechParams, OptOtherParams]:
+    """
+    A meshed network of 4 nodes and 5 lines, with all the technologies of the default config, over R hours
+    """
+    rng = np.random.default_rng(seed)
+    N, FL = np.arange(4), np.arange(5)
+    G, SC = ['onshore', 'solar', 'biomass', 'gas'], ['battery', 'hydrogen']
+    et_params = EnergyTechParams(N=N, FL=FL, G=G, SC=SC, RES=['onshore', 'solar', 'biomass'], non_VRES=['biomass', 'gas'])
+    other_params = OptOtherParams(
+        lol=23000, R=R, denominator_R=8760, T=np.arange(0, R), T2=np.arange(1, R), CT=10000, r=0.05, LT=40,
+        reserve_margin=0.5, omega=omega, e_l=0.25, start_hour=0,
+    )
+
+    lines = pd.DataFrame({
+        'region1': [0, 1, 2, 3, 0], 'region2': [1, 2, 3, 0, 2], 'x': [0.1, 0.2, 0.15, 0.25, 0.3],
+        'capacity': [200.0, 150.0, 100.0, 250.0, 50.0], 'length': [50.0, 80.0, 60.0, 120.0, 90.0],
+    })
+    existing_capacity = pd.DataFrame(0.0, index=N, columns=G + SC)
+    existing_capacity.loc[0, 'gas'] = 400.0
+    existing_capacity.loc[2, 'onshore'] = 100.0
+
+    hours = np.arange(R)
+    daily = np.sin(np.pi * ((hours % 24) - 6) / 12)
+    arr_demand = (400 + 150 * np.maximum(daily, 0))[None, :] * np.array([1.0, 0.6, 0.8, 0.4])[:, None]
+    arr_onshore = rng.uniform(0.05, 0.8, size=(len(N), R))
+    arr_solar = np.maximum(daily, 0)[None, :] * rng.uniform(0.6, 0.9, size=(len(N), 1))
+
+    inputs = OptimizationInputs(
+        C={'onshore': 1.3e6, 'solar': 0.6e6, 'biomass': 2.5e6, 'gas': 0.8e6, 'battery': 0.15e6, 'hydrogen': 1.0e6},
+        C_S={'battery': 0.25e6, 'hydrogen': 0.01e6},
+        a={'onshore': 3e4, 'solar': 1e4, 'biomass': 8e4, 'gas': 2e4, 'battery': 5e3, 'hydrogen': 2e4},
+        b={'onshore': 1.0, 'solar': 0.5, 'biomass': 45.0, 'gas': 70.0},
+        L={'onshore': 25, 'solar': 25, 'biomass': 30, 'gas': 30, 'battery': 15, 'hydrogen': 20},
+        eta_in={'battery': 0.95, 'hydrogen': 0.7}, eta_out={'battery': 0.95, 'hydrogen': 0.55},
+        KM_onshore={n: 40.0 + 20 * n for n in N}, KM_solar={n: 10.0 + 5 * n for n in N},
+        capacity_density_onshore=5, capacity_density_solar=30,
+        existing_capacity=existing_capacity,
+        PTDF=compute_ptdf(lines, len(N)), existing_line=lines['capacity'], distance=lines['length'],
+        line_from=lines['region1'].to_numpy(), line_to=lines['region2'].to_numpy(),
+        line_x=lines['x'].to_numpy(dtype=float),
+        arr_demand=arr_demand, arr_onshore=arr_onshore, arr_solar=arr_solar,
+    )
+    return inputs, et_params, other_params
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from grim_opt.batch import run_batch
+from grim_opt.scenario import run_scenario
+
+from conftest import land_cover_config, write_land_cover_experiment
+
+
+def test_batch_scenarios_with_worker_processes(tmp_path):
+    # every scenario runs in a process of the batch, and starts a pool of its own for the land cover tiles
+    cfg_paths = []
+    for k in range(2):
+        root = write_land_cover_experiment(tmp_path / f'exp{k}', seed=k)
+        (root / 'config.yaml').write_text(land_cover_config(tile_size=16, workers=2))
+        cfg_paths.append(root / 'config.yaml')
+
+    results = run_batch(cfg_paths, max_workers=2, solver_threads=1)
+
+    assert [res.status for res in results] == ['ok', 'ok'], [res.error for res in results]
+    assert [res.cfg_path for res in results] == cfg_paths
+
+    # same tables as a serial run in this process
+    for k, cfg_path in enumerate(cfg_paths):
+        root = write_land_cover_experiment(tmp_path / f'serial{k}', seed=k)
+        (root / 'config.yaml').write_text(land_cover_config(tile_size=16, workers=1))
+        run_scenario(root / 'config.yaml')
+
+        table = 'outputs/region_area_land_cover_classes.csv'
+        pd.testing.assert_frame_equal(pd.read_csv(cfg_path.parent / table), pd.read_csv(root / table))
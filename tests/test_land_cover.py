@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from grim_opt import land_cover
+from grim_opt.scenario import run_scenario
+
+from conftest import CELL, land_cover_config, raster_axes, random_land_cover, write_land_cover_experiment
+
+ROW_NAMES = [1, 2, 3, 7, 8, 9, 12, 15, 16, 18, 20, 21, 23, 24, 25, 26, 27, 29, 30, 32, 35, 36, 37]
+BUFFERS = [(2, [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]), (0, [1, 2])]
+
+
+def square(x0: float, y0: float, size: float) -> np.ndarray:
+    return np.array([(x0, y0), (x0 + size, y0), (x0 + size, y0 + size), (x0, y0 + size)])
+
+
+def count_tile(data, shapes, num_regions) -> np.ndarray:
+    x, y = raster_axes(data.shape)
+    ring_veluwe = square(x[0] - 10 * CELL, y[0] + 10 * CELL, 5 * CELL)  # outside the raster
+    return land_cover.__count_tile(
+        data, (0, y.size), (0, x.size), x, y, BUFFERS, 'edt', shapes, ring_veluwe, ROW_NAMES, num_regions,
+    )
+
+
+def test_count_tile_overlapping_regions():
+    data = random_land_cover((40, 50))
+    x, y = raster_axes(data.shape)
+    # region 1 covers a part of region 0, region 2 is inside region 0
+    shapes = [
+        (0, square(x[5], y[30], 30 * CELL)),
+        (1, square(x[20], y[35], 25 * CELL)),
+        (2, square(x[10], y[25], 8 * CELL)),
+    ]
+
+    counts = count_tile(data, shapes, len(shapes))
+
+    # every region counts all of its cells, as when it is rasterized on its own
+    for label, ring in shapes:
+        alone = count_tile(data, [(label, ring)], len(shapes))
+        np.testing.assert_array_equal(counts[:, label], alone[:, label])
+    assert counts[:, 1].sum() > 0 and counts[:, 2].sum() > 0
+
+
+def run_land_cover(root, tile_size=None, workers=None) -> pd.DataFrame:
+    (root / 'config.yaml').write_text(land_cover_config(tile_size, workers))
+    run_scenario(root / 'config.yaml')
+    return pd.read_csv(root / 'outputs' / 'region_area_land_cover_classes.csv', index_col=0)
+
+
+@pytest.mark.parametrize('tile_size, workers', [(16, None), (7, None), (16, 2), (None, 2)])
+def test_land_cover_tiles_and_workers(tmp_path, tile_size, workers):
+    # the whole raster at once, in this process
+    expected = run_land_cover(write_land_cover_experiment(tmp_path / 'whole'))
+    assert np.nansum(expected.to_numpy(dtype=float)) > 0
+
+    table = run_land_cover(write_land_cover_experiment(tmp_path / 'tiles'), tile_size, workers)
+
+    pd.testing.assert_frame_equal(table, expected)
@@ -0,0 +1,99 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+from pyomo.environ import value
+
+from grim_opt.config import OptFormulationParams, SolverParams
+from grim_opt.highs_solver import HighsSolver
+from grim_opt.optimization import build_pyomo_model, make_pyomo_solver
+from grim_opt.optimization_matrix import build_linear_program, set_res_share, solve_linear_program
+from grim_opt.ptdf import flow_nonzeros_per_time_step, sparsify_ptdf
+
+from conftest import small_optimization_instance
+
+pytest.importorskip('highspy')
+
+# omega >= 1: a RES share of at least 1 / omega, binding for all three
+OMEGAS = [1.0, 1.25, 1.5]
+HIGHS = SolverParams(name='highs', crossover=None, method=None, threads=None, warm_start=True)
+
+
+def formulation(**kwargs) -> OptFormulationParams:
+    params = dict(model_builder='pyomo', flow_formulation='ptdf', ptdf_threshold=0.0, eliminate_auxiliary=False)
+    params.update(kwargs)
+    return OptFormulationParams(**params)
+
+
+def pyomo_objective(omega: float, **kwargs) -> float:
+    inputs, et_params, other_params = small_optimization_instance(omega=omega)
+    model = build_pyomo_model(inputs, et_params, other_params, formulation(**kwargs))
+    make_pyomo_solver(HIGHS).solve(model)
+    return value(model.obj)
+
+
+def test_pyomo_sweep_updates_omega_in_place():
+    # one model and one APPSI solver for all the omegas, as in perform_optimization_sweep
+    inputs, et_params, other_params = small_optimization_instance(omega=OMEGAS[0])
+    model = build_pyomo_model(inputs, et_params, other_params, formulation())
+    opt = make_pyomo_solver(HIGHS)
+
+    for omega in OMEGAS:
+        model.omega.set_value(omega)
+        opt.solve(model)
+        assert value(model.obj) == pytest.approx(pyomo_objective(omega), rel=1e-7)
+
+
+@pytest.mark.parametrize('eliminate_auxiliary', [False, True])
+@pytest.mark.parametrize('flow_formulation', ['ptdf', 'angle'])
+@pytest.mark.parametrize('model_builder, solver', [('pyomo', 'highs'), ('matrix', 'highs'), ('matrix', 'scipy')])
+def test_formulations_objective(model_builder, solver, flow_formulation, eliminate_auxiliary):
+    # every builder and formulation solves the same problem as the reference model (Pyomo, PTDF, with F and Z_net)
+    expected = pyomo_objective(OMEGAS[0])
+    params = formulation(model_builder=model_builder, flow_formulation=flow_formulation,
+                         eliminate_auxiliary=eliminate_auxiliary)
+    inputs, et_params, other_params = small_optimization_instance(omega=OMEGAS[0])
+
+    if model_builder == 'pyomo':
+        model = build_pyomo_model(inputs, et_params, other_params, params)
+        make_pyomo_solver(replace(HIGHS, name=solver)).solve(model)
+        objective = value(model.obj)
+    else:
+        lp = build_linear_program(inputs, et_params, other_params, params)
+        solution = solve_linear_program(lp, replace(HIGHS, name=solver))
+        objective = lp.c @ solution + lp.c0
+
+    assert objective == pytest.approx(expected, rel=1e-6)
+
+
+def test_matrix_sweep_replaces_res_share_row():
+    # one HiGHS instance for all the omegas, as in perform_optimization_sweep
+    inputs, et_params, other_params = small_optimization_instance(omega=OMEGAS[0])
+    params = formulation(model_builder='matrix')
+    lp = build_linear_program(inputs, et_params, other_params, params)
+    highs = HighsSolver(lp, HIGHS)
+
+    for omega in OMEGAS:
+        set_res_share(lp, et_params, omega)
+        highs.replace_row(lp, lp.row_blocks['RES_share_rule'][0])
+        solution = highs.solve()
+        assert lp.c @ solution + lp.c0 == pytest.approx(pyomo_objective(omega), rel=1e-6)
+
+
+@pytest.mark.parametrize('ptdf_threshold', [0.0, 0.2])
+@pytest.mark.parametrize('eliminate_auxiliary', [False, True])
+def test_flow_nonzeros_per_time_step(eliminate_auxiliary, ptdf_threshold):
+    inputs, et_params, other_params = small_optimization_instance()
+    PTDF = sparsify_ptdf(inputs.PTDF, ptdf_threshold)
+    inputs = replace(inputs, PTDF=PTDF)
+
+    # the rest of the model is the same for both formulations
+    nonzeros = {}
+    for flow_formulation in ['ptdf', 'angle']:
+        params = formulation(model_builder='matrix', flow_formulation=flow_formulation,
+                             eliminate_auxiliary=eliminate_auxiliary)
+        lp = build_linear_program(inputs, et_params, other_params, params)
+        nonzeros[flow_formulation] = np.count_nonzero(lp.A.data)
+
+    expected = flow_nonzeros_per_time_step(PTDF[et_params.FL], len(et_params.FL), len(et_params.N), eliminate_auxiliary)
+    assert nonzeros['angle'] - nonzeros['ptdf'] == (expected['angle'] - expected['ptdf']) * other_params.R
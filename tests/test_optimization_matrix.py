@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from grim_opt.config import SolverParams
+from grim_opt.optimization_matrix import LinearProgram, solve_linear_program
+
+
+def small_lp() -> LinearProgram:
+    # min x + 2 y  s.t.  x + y >= 1,  x <= 0.25
+    return LinearProgram(
+        c=np.array([1.0, 2.0]), c0=0.0, A=sp.csr_matrix(np.array([[1.0, 1.0]])),
+        row_lower=np.array([1.0]), row_upper=np.array([np.inf]),
+        col_lower=np.zeros(2), col_upper=np.array([0.25, np.inf]),
+        col_blocks={}, col_labels={}, row_blocks={}, hour_weights=np.ones(1),
+    )
+
+
+def solver_params(**kwargs) -> SolverParams:
+    params = dict(name='scipy', crossover=None, method=None, threads=None, warm_start=True)
+    params.update(kwargs)
+    return SolverParams(**params)
+
+
+@pytest.mark.parametrize('method', [None, 1, 2])
+def test_solve_linear_program(method):
+    np.testing.assert_allclose(solve_linear_program(small_lp(), solver_params(method=method)), [0.25, 0.75])
+
+
+def test_solve_linear_program_unknown_method():
+    with pytest.raises(ValueError, match='Unknown solver method: 3'):
+        solve_linear_program(small_lp(), solver_params(method=3))
+
+
+@pytest.mark.parametrize('settings, match', [
+    (dict(method=0), 'primal simplex'),
+    (dict(method=2, crossover=0), 'crossover'),
+    (dict(threads=4), 'threads 4'),
+])
+def test_solve_linear_program_unsupported_settings(settings, match):
+    with pytest.warns(UserWarning, match=match):
+        solve_linear_program(small_lp(), solver_params(**settings))
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from matplotlib.path import Path
+
+from grim_opt.rasterize import rasterize_polygons
+
+SQUARES = [
+    (0, np.array([(0.5, 0.5), (6.5, 0.5), (6.5, 6.5), (0.5, 6.5)])),
+    (1, np.array([(3.5, 2.5), (9.5, 2.5), (9.5, 8.5), (3.5, 8.5)])),
+]
+
+
+def random_ring(rng: np.random.Generator, center, radius: float, vertices: int) -> np.ndarray:
+    # a star-shaped (simple, possibly concave) polygon
+    angles = np.sort(rng.uniform(0, 2 * np.pi, vertices))
+    radii = radius * rng.uniform(0.3, 1.0, vertices)
+    return np.column_stack([center[0] + radii * np.cos(angles), center[1] + radii * np.sin(angles)])
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('flip_y', [False, True])
+def test_rasterize_polygons_matches_contains_points(seed, flip_y):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.0, 100.0, 87)
+    y = np.linspace(0.0, 80.0, 71)[::-1] if flip_y else np.linspace(0.0, 80.0, 71)
+    shapes = [
+        (label, random_ring(rng, rng.uniform(10, 80, 2), rng.uniform(5, 40), rng.integers(3, 40)))
+        for label in range(6)
+    ]
+    overlaps = []
+
+    labels = rasterize_polygons(shapes, x, y, overlaps=overlaps)
+
+    centers = np.column_stack([np.tile(x, len(y)), np.repeat(y, len(x))])
+    expected = np.full(len(y) * len(x), -1)
+    covered = np.zeros((len(shapes), len(y) * len(x)), dtype=bool)
+    for label, ring in shapes:
+        covered[label] = Path(ring).contains_points(centers)
+        expected[covered[label]] = label  # the last polygon wins
+    np.testing.assert_array_equal(labels.ravel(), expected)
+
+    # together with the overlaps, every polygon gets all of its cells
+    for label, _ in shapes:
+        cells = np.flatnonzero(labels.ravel() == label)
+        lost = np.concatenate([cells] + [lost_cells[lost_labels == label] for lost_labels, lost_cells in overlaps])
+        np.testing.assert_array_equal(np.unique(lost), np.flatnonzero(covered[label]))
+
+
+@pytest.mark.parametrize('flip_x, flip_y', [(False, False), (True, False), (False, True), (True, True)])
+def test_rasterize_polygons_overlaps(flip_x, flip_y):
+    x, y = np.arange(10.0), np.arange(9.0)
+    x, y = (x[::-1] if flip_x else x), (y[::-1] if flip_y else y)
+    overlaps = []
+
+    labels = rasterize_polygons(SQUARES, x, y, overlaps=overlaps)
+
+    # the cells of square 0 taken over by square 1, with the label they lost
+    first = rasterize_polygons(SQUARES[:1], x, y)
+    second = rasterize_polygons(SQUARES[1:], x, y)
+    assert len(overlaps) == 1
+    lost, cells = overlaps[0]
+    np.testing.assert_array_equal(lost, 0)
+    np.testing.assert_array_equal(np.sort(cells), np.flatnonzero((first == 0) & (second == 1)))
+    np.testing.assert_array_equal(labels.ravel()[cells], 1)